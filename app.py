@@ -1,33 +1,30 @@
 import streamlit as st
 from datetime import datetime
-import pandas as pd
-import altair as alt
 import json
+import os
 
-from src.sales_agent import scan_rfps, prioritize_rfps
+from src.sales_agent import scan_rfps, deduplicate_rfps, prioritize_rfps
 from utils.pdf_reader import extract_full_text
-from utils.section_finder import find_section
-from utils.normalizer import (
-    extract_voltage,
-    extract_conductor,
-    extract_insulation,
-    extract_cores,
-    extract_armouring
-)
+from src.orchestrator import extract_rfp_specs, rfp_decision
 from src.technical_agent import (
     load_skus,
-    compute_spec_match,
-    build_comparison_table,
-    classify_match
+    build_catalog,
+    MatchCache,
+    build_comparison_table
 )
-from src.pricing_agent import compute_pricing
-from src.mto_agent import generate_mto_request  # <-- NEW IMPORT
+from src.pricing_agent import total_test_cost, price_matches
+from src.mto_agent import generate_mto_request, is_voltage_mismatch, estimate_mto_pricing, MTO_PREMIUM_PCT
+from src.similarity_index import SkuSimilarityIndex
+from src.results_store import ResultsStore, MATCHES_STORED_PER_RFP
+from src.summary_export import export_store
 
 # ---------------- CONFIG ----------------
 RFP_SALES_FOLDER = "data/rfps_sales"
 SKU_PATH = "data/skus/SKUs.xlsx"
 TEST_PRICE_PATH = "data/pricing/test_prices.xlsx"
 QUANTITY_KM = 10
+RESULTS_DB = "data/results.db"
+EXPORT_DIR = "data/exports"
 
 st.set_page_config(
     page_title="Agentic AI – RFP Response Automation",
@@ -56,6 +53,43 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+@st.cache_resource
+def get_results_store() -> ResultsStore:
+    return ResultsStore(RESULTS_DB)
+
+
+@st.cache_resource
+def get_match_cache() -> MatchCache:
+    # Survives reruns; a rebuilt catalog with a new SKU master invalidates it
+    return MatchCache()
+
+
+@st.cache_data(show_spinner=False)
+def get_exports(doc_state: tuple) -> list:
+    """
+    Summary files as (file name, bytes), written once per store state:
+    doc_state is one (rfp_id, doc_path, decided_at) per selected document,
+    so reruns (e.g. download clicks) reuse them until a document is
+    reprocessed
+    """
+    paths = export_store(get_results_store(), EXPORT_DIR, doc_keys=[(rfp_id, doc_path) for rfp_id, doc_path, _ in doc_state])
+    exports = []
+    for path in paths:
+        with open(path, "rb") as f:
+            exports.append((os.path.basename(path), f.read()))
+    return exports
+
+
+@st.cache_resource
+def get_reference_data(sku_mtime: float, test_price_mtime: float) -> tuple:
+    # Rebuilt only when the SKU master or test price sheet changes on disk
+    catalog = build_catalog(load_skus(SKU_PATH))
+    return catalog, SkuSimilarityIndex(catalog.df), total_test_cost(TEST_PRICE_PATH)
+
+
+store = get_results_store()
+match_cache = get_match_cache()
+
 st.title("Agentic AI – B2B RFP Response Automation")
 st.caption("EY Techathon | Demonstratable Agentic AI Prototype")
 
@@ -65,8 +99,9 @@ st.caption("EY Techathon | Demonstratable Agentic AI Prototype")
 st.header("Sales Agent – RFP Discovery & 90-Day Prioritization")
 
 if st.button("Scan & Prioritize RFPs"):
-    rfps = scan_rfps(RFP_SALES_FOLDER)
+    rfps = deduplicate_rfps(scan_rfps(RFP_SALES_FOLDER))
     prioritized = prioritize_rfps(rfps, days=90)
+    store.upsert_rfps(rfps)
 
     today = datetime.today()
     sales_rows = []
@@ -87,6 +122,8 @@ if st.button("Scan & Prioritize RFPs"):
 
     st.subheader("Discovered RFPs")
 
+    import pandas as pd
+
     df_sales = pd.DataFrame(sales_rows)
 
     # Stable column order (prevents Streamlit/pandas weird inference)
@@ -112,73 +149,92 @@ if st.button("Scan & Prioritize RFPs"):
 # =====================================================
 # TECHNICAL + PRICING (MULTI-RFP)
 # =====================================================
+def process_rfp(rfp: dict, doc_mtime: float, catalog, sim_index, test_cost: float) -> dict:
+    """
+    Technical + pricing (or MTO) result for one document, in the shape
+    ResultsStore.save_results expects
+    """
+    # Reuse specs already extracted from this exact document
+    rfp_specs = store.cached_specs(rfp["rfp_id"], rfp["path"], doc_mtime)
+    if rfp_specs is None:
+        rfp_specs = extract_rfp_specs(extract_full_text(rfp["path"]))
+
+    matches = match_cache.match(catalog, rfp_specs)
+
+    # Decision summary must include MTO results too (so RFP3 shows up)
+    result = {
+        "rfp_id": rfp["rfp_id"],
+        "rfp_specs": rfp_specs,
+        "doc_path": rfp["path"],
+        "doc_mtime": doc_mtime,
+        "catalog_version": catalog.version,
+        "matches": matches,
+        "pricing": None,
+        "mto_request": None,
+        # NO_MATCH or mandatory voltage class mismatch -> MTO
+        "decision": rfp_decision(matches, rfp_specs)
+    }
+
+    if result["decision"]["mto_triggered"]:
+        # Nearest SKU by attribute distance, not just the top exact-match score
+        closest_sku = sim_index.closest_skus(rfp_specs, k=1)[0]
+
+        # Include an MTO line in consolidated pricing so RFP3 appears
+        result["mto_request"] = generate_mto_request(rfp_meta=rfp, rfp_specs=rfp_specs, closest_sku_row=closest_sku, catalog=catalog)
+        result["extra_pricing"] = [estimate_mto_pricing(closest_sku, QUANTITY_KM)]
+    else:
+        result["pricing"] = price_matches(matches, QUANTITY_KM, test_cost)
+
+    return result
+
+
 if "eligible_rfps" in st.session_state and st.session_state["eligible_rfps"]:
     st.header("Technical & Pricing Agents – Multi-RFP Processing")
 
-    sku_df = load_skus(SKU_PATH)
+    # Tables and charts are only needed once RFPs are selected; keep
+    # pandas and altair off the cold-start path
+    import altair as alt
+    import pandas as pd
 
-    decision_summary = []
-    pricing_summary = []
-
-    for rfp in st.session_state["eligible_rfps"]:
+    catalog, sim_index, test_cost = get_reference_data(
+        os.path.getmtime(SKU_PATH), os.path.getmtime(TEST_PRICE_PATH)
+    )
+    eligible = [(rfp, os.path.getmtime(rfp["path"])) for rfp in st.session_state["eligible_rfps"]]
+
+    # Only documents without a decision for this revision and SKU master
+    # are processed; reruns (e.g. download clicks) render from the store
+    stale = [
+        (rfp, doc_mtime) for rfp, doc_mtime in eligible
+        if store.decision(rfp["rfp_id"], rfp["path"], doc_mtime, catalog.version) is None
+    ]
+    if stale:
+        with st.spinner(f"Processing {len(stale)} RFP(s)..."):
+            # One transaction for the whole batch
+            store.save_results([process_rfp(rfp, doc_mtime, catalog, sim_index, test_cost) for rfp, doc_mtime in stale])
+
+    for rfp, doc_mtime in eligible:
         st.subheader(f"RFP: {rfp['rfp_id']}")
 
-        # ---------------- Technical Agent ----------------
-        rfp_text = extract_full_text(rfp["path"])
-        tech_section = find_section(
-            rfp_text,
-            ["technical requirements", "scope of supply"],
-            ["integration approach", "security"]
-        )
-
-        rfp_specs = {
-            "voltage_kV": extract_voltage(tech_section),
-            "conductor": extract_conductor(tech_section),
-            "insulation": extract_insulation(tech_section),
-            "cores": extract_cores(tech_section),
-            "armoured": extract_armouring(tech_section)
-        }
+        decision = store.decision(rfp["rfp_id"], rfp["path"])
+        rfp_specs = store.cached_specs(rfp["rfp_id"], rfp["path"], doc_mtime)
 
+        # ---------------- Technical Agent ----------------
         st.markdown("**Extracted RFP Specifications**")
         st.table(
             [{"Parameter": k.replace("_", " ").title(), "Required Value": v}
              for k, v in rfp_specs.items()]
         )
 
-        match_df = classify_match(
-            compute_spec_match(sku_df, rfp_specs)
-        )
-
-        best = match_df.iloc[0]
-
-        # =====================================================
-        # OPTION B: VOLTAGE MISMATCH HARD TRIGGER FOR MTO
-        # =====================================================
-        rfp_v = rfp_specs.get("voltage_kV")
-        best_v = best.get("Voltage_kV")
-
-        voltage_mismatch = False
-        try:
-            if rfp_v is not None and best_v is not None:
-                voltage_mismatch = float(rfp_v) != float(best_v)
-        except Exception:
-            voltage_mismatch = False
-
-        mto_triggered = (best["match_classification"] == "NO_MATCH") or voltage_mismatch
-
-        # Decision summary must include MTO results too (so RFP3 shows up)
-        decision_summary.append({
-            "RFP ID": rfp["rfp_id"],
-            "Best SKU": (best["SKU_ID"] if not mto_triggered else "MTO_REQUIRED"),
-            "Spec Match %": f"{best['spec_match_pct']}%",
-            "Classification": ("MTO_TRIGGERED" if mto_triggered else best["match_classification"])
-        })
+        # Stored ranking joined back to the SKU master for the comparison table
+        chart_df = pd.DataFrame(
+            store.top_matches(rfp["rfp_id"], MATCHES_STORED_PER_RFP, rfp["path"]),
+            columns=["sku_id", "spec_match_pct", "classification"]
+        ).rename(columns={"sku_id": "SKU_ID", "classification": "match_classification"})
+        match_df = chart_df.merge(catalog.df, on="SKU_ID", how="left")
 
         # ---------- Slim Spec Match Bar ----------
         st.markdown("**Spec Match Confidence by SKU**")
 
-        chart_df = match_df[["SKU_ID", "spec_match_pct", "match_classification"]]
-
         bar_chart = (
             alt.Chart(chart_df)
             .mark_bar(size=18)
@@ -219,21 +275,19 @@ if "eligible_rfps" in st.session_state and st.session_state["eligible_rfps"]:
             st.dataframe(comparison_df, use_container_width=True)
 
         # ---------------- NO_MATCH / MTO FLOW ----------------
-        if mto_triggered:
-            if voltage_mismatch:
+        if decision["mto_triggered"]:
+            # =====================================================
+            # OPTION B: VOLTAGE MISMATCH HARD TRIGGER FOR MTO
+            # =====================================================
+            if not match_df.empty and is_voltage_mismatch(rfp_specs, match_df.iloc[0].to_dict()):
                 st.error("No suitable standard SKU found (Mandatory voltage class mismatch)")
             else:
                 st.error("No suitable standard SKU found")
 
             st.info("Made-to-Order workflow triggered for engineering feasibility")
 
-            closest_sku = match_df.iloc[0].to_dict()
-
-            mto_payload = generate_mto_request(
-                rfp_meta=rfp,
-                rfp_specs=rfp_specs,
-                closest_sku_row=closest_sku
-            )
+            mto_payload = store.mto_request(rfp["rfp_id"], rfp["path"])
+            closest_sku = mto_payload["closest_sku"]
 
             st.markdown("**Engineering / MTO Request Generated**")
             gap_df = pd.DataFrame(mto_payload["gap_table"])
@@ -248,49 +302,45 @@ if "eligible_rfps" in st.session_state and st.session_state["eligible_rfps"]:
             )
 
             st.markdown("**Pricing Fallback (Rough Estimate)**")
-            base_unit_price = closest_sku.get("Unit_Price_per_km_INR", 0) or 0
-            customization_premium_pct = 12
-            estimated_material_cost = int(base_unit_price * QUANTITY_KM * (1 + customization_premium_pct / 100))
+            mto_pricing = estimate_mto_pricing(closest_sku, QUANTITY_KM)
 
             st.write(f"Closest SKU used for estimate: **{closest_sku.get('SKU_ID')}**")
-            st.write(f"Customization premium applied: **{customization_premium_pct}%**")
-            st.write(f"Estimated Material Cost (₹): **₹ {estimated_material_cost:,.0f}**")
+            st.write(f"Customization premium applied: **{MTO_PREMIUM_PCT}%**")
+            st.write(f"Estimated Material Cost (₹): **₹ {mto_pricing['material_cost']:,.0f}**")
             st.caption("Note: Final pricing requires engineering feasibility, BOM, and lead-time confirmation.")
 
-            # Include an MTO line in consolidated pricing so RFP3 appears
-            pricing_summary.append({
-                "RFP ID": rfp["rfp_id"],
-                "SKU": "MTO_REQUIRED",
-                "Material Cost (₹)": f"₹ {estimated_material_cost:,.0f}",
-                "Test Cost (₹)": "TBD",
-                "Total Cost (₹)": "TBD"
-            })
-
-            continue
-
-        # ---------------- Pricing Agent ----------------
-        pricing_df = compute_pricing(
-            matched_df=match_df,
-            quantity_km=QUANTITY_KM,
-            test_price_path=TEST_PRICE_PATH
-        )
-
-        for _, row in pricing_df.iterrows():
-            pricing_summary.append({
-                "RFP ID": rfp["rfp_id"],
-                "SKU": row["SKU_ID"],
-                "Material Cost (₹)": f"₹ {row['material_cost']:,.0f}",
-                "Test Cost (₹)": f"₹ {row['test_cost']:,.0f}",
-                "Total Cost (₹)": f"₹ {row['total_cost']:,.0f}"
-            })
-
     # =====================================================
-    # CONSOLIDATED OUTPUTS
+    # CONSOLIDATED OUTPUTS (served from the results store)
     # =====================================================
+    # The selected documents, not every stored revision sharing an RFP ID
+    doc_keys = [(r["rfp_id"], r["path"]) for r in st.session_state["eligible_rfps"]]
+
+    def inr(value):
+        return "TBD" if value is None else f"₹ {value:,.0f}"
+
     st.header("Consolidated Decision Summary")
-    df_decision = pd.DataFrame(decision_summary)
+    df_decision = pd.DataFrame([
+        {
+            "RFP ID": d["rfp_id"],
+            "Best SKU": d["best_sku"],
+            "Spec Match %": f"{d['spec_match_pct']}%",
+            "Classification": d["classification"]
+        }
+        for d in store.decision_summary(doc_keys=doc_keys)
+    ])
     st.data_editor(df_decision, use_container_width=True, hide_index=True, disabled=True)
 
+    pricing_summary = [
+        {
+            "RFP ID": p["rfp_id"],
+            "SKU": p["sku_id"],
+            "Material Cost (₹)": inr(p["material_cost"]),
+            "Test Cost (₹)": inr(p["test_cost"]),
+            "Total Cost (₹)": inr(p["total_cost"])
+        }
+        for p in store.pricing_summary(doc_keys=doc_keys)
+    ]
+
     st.header("Consolidated Pricing Summary")
     if pricing_summary:
         df_price = pd.DataFrame(pricing_summary)
@@ -298,5 +348,24 @@ if "eligible_rfps" in st.session_state and st.session_state["eligible_rfps"]:
     else:
         st.warning("No RFPs qualified for standard pricing.")
 
+    # Full numeric results (not the formatted strings above)
+    st.header("Export")
+    export_mime = {
+        ".xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        ".csv": "text/csv"
+    }
+    doc_state = tuple(
+        (rfp_id, doc_path, (store.decision(rfp_id, doc_path) or {}).get("decided_at"))
+        for rfp_id, doc_path in doc_keys
+    )
+    for file_name, data in get_exports(doc_state):
+        st.download_button(
+            label=f"Download {file_name}",
+            data=data,
+            file_name=file_name,
+            mime=export_mime[os.path.splitext(file_name)[1]],
+            key=f"export_{file_name}"
+        )
+
 st.markdown("---")
 st.caption("Design intent: executive-friendly decision support with explainable logic.")
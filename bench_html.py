@@ -0,0 +1,75 @@
+"""
+Benchmark: BeautifulSoup html.parser vs streaming lxml tender extraction
+
+Generates a synthetic portal listing page (navigation / table filler
+around N tender blocks), then times
+  - parse_html          (full BeautifulSoup tree + get_text, one record)
+  - parse_html_tenders  (lxml iterparse, one record per tender block)
+
+Peak memory is tracemalloc's Python-heap figure; libxml2's own C
+allocations are not traced, so treat the lxml number as a lower bound.
+
+Usage: python bench_html.py [n_tenders] [filler_rows_per_tender]
+"""
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from src.sales_agent import parse_html, parse_html_tenders
+
+TENDER_BLOCK = """
+<div class="rfp">
+    <p><strong>RFP ID:</strong> PORTAL-{i:05d}</p>
+    <p><strong>Issuing Authority:</strong> Authority {i}</p>
+    <p><strong>Category:</strong> LT Power Cables</p>
+    <p><strong>Due Date:</strong> {day:02d}-11-2026</p>
+</div>
+"""
+FILLER_ROW = "<tr><td>{j}</td><td>Corrigendum / clarification notice {j}</td><td><a href='#'>view</a></td></tr>"
+
+
+def write_listing_page(path: str, n_tenders: int, filler_rows: int):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("<!DOCTYPE html><html><head><title>Tender Listing</title></head><body>")
+        for i in range(n_tenders):
+            f.write(TENDER_BLOCK.format(i=i, day=i % 28 + 1))
+            f.write("<table>")
+            for j in range(filler_rows):
+                f.write(FILLER_ROW.format(j=j))
+            f.write("</table>")
+        f.write("</body></html>")
+
+
+def measure(fn, path: str) -> tuple:
+    start = time.perf_counter()
+    result = fn(path)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    fn(path)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    records = result if isinstance(result, list) else [result]
+    return elapsed, peak, len(records)
+
+
+def main():
+    n_tenders = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    filler_rows = int(sys.argv[2]) if len(sys.argv) > 2 else 400
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "listing.html")
+        write_listing_page(path, n_tenders, filler_rows)
+        size_mb = os.path.getsize(path) / 1e6
+
+        print(f"Listing page: {size_mb:.1f} MB, {n_tenders} tenders")
+        for label, fn in [("bs4 html.parser", parse_html), ("lxml iterparse", parse_html_tenders)]:
+            elapsed, peak, n = measure(fn, path)
+            print(f"  {label:<16} {elapsed:7.3f} s   peak {peak / 1e6:7.1f} MB   {n} record(s)")
+
+
+if __name__ == "__main__":
+    main()
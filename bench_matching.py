@@ -0,0 +1,118 @@
+"""
+Benchmark: DataFrame matching path vs compact record path
+
+Builds a synthetic SKU master, matches a batch of RFP specs through
+  - classify_match(compute_spec_match(df, specs))  (DataFrame per RFP)
+  - match_catalog(build_catalog(df), specs)        (structured arrays)
+and reports wall time, peak traced memory (separate traced run, since
+tracemalloc slows everything down) and the size of one RFP's retained
+match + pricing result.
+
+Usage: python bench_matching.py [n_skus] [n_rfps]
+"""
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from src.technical_agent import (
+    compute_spec_match,
+    classify_match,
+    build_catalog,
+    match_catalog
+)
+from src.pricing_agent import PRICED_CLASSES, price_matches
+
+VOLTAGES = [0.6, 1.1, 3.3, 6.6, 11.0]
+CONDUCTORS = ["Aluminium", "Copper"]
+INSULATIONS = ["XLPE", "PVC"]
+CORES = [1, 2, 3, 4]
+ARMOURED = ["Yes", "No"]
+QUANTITY_KM = 10
+TEST_COST = 45000
+
+
+def synthetic_skus(n: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "SKU_ID": [f"SYN-{i:07d}" for i in range(n)],
+        "Product_Category": "LT Power Cable",
+        "Voltage_kV": rng.choice(VOLTAGES, n),
+        "Conductor": rng.choice(CONDUCTORS, n),
+        "Insulation": rng.choice(INSULATIONS, n),
+        "Cores": rng.choice(CORES, n),
+        "Armoured": rng.choice(ARMOURED, n),
+        "Unit_Price_per_km_INR": rng.integers(50_000, 300_000, n)
+    })
+
+
+def synthetic_specs(n: int, seed: int = 1) -> list:
+    rng = np.random.default_rng(seed)
+    return [
+        {
+            "voltage_kV": float(rng.choice(VOLTAGES)),
+            "conductor": str(rng.choice(CONDUCTORS)),
+            "insulation": str(rng.choice(INSULATIONS)),
+            "cores": int(rng.choice(CORES)),
+            "armoured": str(rng.choice(ARMOURED))
+        }
+        for _ in range(n)
+    ]
+
+
+def dataframe_path(df: pd.DataFrame, specs_list: list):
+    results = []
+    for specs in specs_list:
+        match_df = classify_match(compute_spec_match(df, specs))
+        eligible = match_df[match_df["match_classification"].isin(PRICED_CLASSES)].copy()
+        eligible["material_cost"] = eligible["Unit_Price_per_km_INR"] * QUANTITY_KM
+        eligible["test_cost"] = TEST_COST
+        eligible["total_cost"] = eligible["material_cost"] + eligible["test_cost"]
+        results.append(
+            match_df.memory_usage(deep=True).sum() + eligible.memory_usage(deep=True).sum()
+        )
+    return results
+
+
+def record_path(df: pd.DataFrame, specs_list: list):
+    catalog = build_catalog(df)
+    results = []
+    for specs in specs_list:
+        matches = match_catalog(catalog, specs)
+        priced = price_matches(matches, QUANTITY_KM, TEST_COST)
+        results.append(matches.ranked.nbytes + priced.nbytes)
+    return results
+
+
+def measure(fn, *args) -> tuple:
+    start = time.perf_counter()
+    retained = fn(*args)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    fn(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, max(retained)
+
+
+def main():
+    n_skus = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    n_rfps = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    df = synthetic_skus(n_skus)
+    specs_list = synthetic_specs(n_rfps)
+
+    print(f"Catalog: {n_skus:,} SKUs, batch: {n_rfps} RFPs")
+    for label, fn in [("DataFrame", dataframe_path), ("Records", record_path)]:
+        elapsed, peak, retained = measure(fn, df, specs_list)
+        print(
+            f"  {label:<10} {elapsed:8.2f} s   peak {peak / 1e6:8.1f} MB"
+            f"   per-RFP result {retained / 1e6:8.1f} MB"
+        )
+
+
+if __name__ == "__main__":
+    main()
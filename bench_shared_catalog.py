@@ -0,0 +1,84 @@
+"""
+Benchmark: worker memory with a shared-memory catalog vs a pickled one
+
+For 1..N worker processes, matches a batch of RFP specs against a
+synthetic catalog either
+  - pickled: the SkuCatalog arrays are sent to every worker
+  - shared:  workers attach to one copy in multiprocessing.shared_memory
+and reports the summed private memory (USS, Linux smaps_rollup) the
+workers hold on top of an idle pool with the same imports. Shared stays
+flat as workers grow; pickled grows linearly.
+
+Usage: python bench_shared_catalog.py [n_skus] [max_workers]
+"""
+import multiprocessing as mp
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from bench_matching import synthetic_skus, synthetic_specs
+from src.technical_agent import build_catalog, match_catalog
+from src.shared_catalog import SharedCatalog, init_catalog_worker, match_in_worker
+
+_pickled_catalog = None
+
+
+def private_memory_bytes() -> int:
+    total = 0
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            if line.startswith(("Private_Clean:", "Private_Dirty:")):
+                total += int(line.split()[1]) * 1024
+    return total
+
+
+def init_pickled_worker(catalog):
+    global _pickled_catalog
+    _pickled_catalog = catalog
+
+
+def noop(rfp_specs: dict):
+    return None
+
+
+def match_pickled(rfp_specs: dict):
+    return match_catalog(_pickled_catalog, rfp_specs).ranked
+
+
+def probe(barrier) -> int:
+    # Every worker blocks until all have arrived, so each probe lands on
+    # a distinct process
+    barrier.wait()
+    return private_memory_bytes()
+
+
+def run(workers: int, initializer, initargs, task, specs_list) -> int:
+    ctx = mp.get_context("spawn")
+    with ctx.Manager() as manager, ProcessPoolExecutor(
+        workers, mp_context=ctx, initializer=initializer, initargs=initargs
+    ) as pool:
+        list(pool.map(task, specs_list))
+        barrier = manager.Barrier(workers)
+        return sum(f.result() for f in [pool.submit(probe, barrier) for _ in range(workers)])
+
+
+def main():
+    n_skus = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    max_workers = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+
+    catalog = build_catalog(synthetic_skus(n_skus))
+    catalog.df = None  # workers only need the matching arrays
+    specs_list = synthetic_specs(max_workers * 4)
+
+    print(f"Catalog: {n_skus:,} SKUs")
+    print(f"{'workers':>8} {'pickled MB':>12} {'shared MB':>12}")
+
+    with SharedCatalog(catalog) as shared:
+        for workers in range(1, max_workers + 1):
+            baseline = run(workers, None, (), noop, specs_list)
+            pickled = run(workers, init_pickled_worker, (catalog,), match_pickled, specs_list) - baseline
+            shared_mem = run(workers, init_catalog_worker, (shared.spec,), match_in_worker, specs_list) - baseline
+            print(f"{workers:>8} {pickled / 1e6:>12.1f} {shared_mem / 1e6:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Import-time budget for the CLI entry point
+
+Runs `python -X importtime -c "import main"` in a fresh interpreter and
+reports the slowest modules. Exits with status 1 if importing main.py
+takes longer than the budget, so heavy dependencies (pandas, PyPDF2,
+BeautifulSoup, altair, streamlit) creeping back onto the cold-start
+path get caught.
+
+Usage: python check_import_time.py [module] [budget_ms]
+"""
+import subprocess
+import sys
+
+DEFAULT_MODULE = "main"
+IMPORT_BUDGET_MS = 50
+HEAVY_MODULES = ["pandas", "numpy", "PyPDF2", "bs4", "altair", "streamlit", "openpyxl"]
+
+
+def measure_import_time(module: str) -> dict:
+    """
+    Returns {module_name: cumulative_us} for one cold import of `module`
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True
+    )
+
+    timings = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _self_us, cumulative_us, name = line.split(":", 1)[1].split("|")
+        timings[name.strip()] = int(cumulative_us)
+
+    return timings
+
+
+def main():
+    module = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_MODULE
+    budget_ms = float(sys.argv[2]) if len(sys.argv) > 2 else IMPORT_BUDGET_MS
+
+    timings = measure_import_time(module)
+    total_ms = timings.get(module, 0) / 1000
+
+    print(f"Import time for '{module}': {total_ms:.1f} ms (budget {budget_ms:.0f} ms)")
+    print("\nSlowest imports (cumulative):")
+    for name, us in sorted(timings.items(), key=lambda kv: kv[1], reverse=True)[:10]:
+        print(f"  {us / 1000:8.1f} ms  {name}")
+
+    eager = [m for m in HEAVY_MODULES if m in timings]
+    if eager:
+        print(f"\nHeavy modules imported eagerly: {', '.join(eager)}")
+
+    if total_ms > budget_ms:
+        print("\nFAIL: import-time budget exceeded")
+        sys.exit(1)
+
+    print("\nOK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,315 @@
+"""
+Distributed execution of the scan -> extract -> match -> price pipeline
+
+A coordinator enqueues RFP documents into a durable SQLite job queue
+(src.job_queue.JobQueue); any number of worker processes, on this or
+other hosts (queue file on a network file system and RFP_QUEUE_SHARED=1
+everywhere, see JobQueue), lease jobs, heartbeat while they work and
+report results;
+failed or abandoned jobs are retried. A job is one document revision
+matched against one SKU master (its id includes both hashes), so changed
+documents or catalogs are processed again. Each coordinator run is a
+batch; merge writes the completed results of the latest (or a given)
+batch into the results store and the summary exports.
+
+Usage:
+  python distributed.py enqueue [queue_db]              coordinator: scan + enqueue
+  python distributed.py worker  [queue_db] [worker_id]  work until the queue drains
+  python distributed.py merge   [queue_db] [batch_id]   results -> results store + exports
+  python distributed.py run     [n_workers]             all of the above locally
+"""
+import multiprocessing as mp
+import os
+import socket
+import sys
+import time
+from datetime import datetime
+
+from src.sales_agent import scan_rfps, deduplicate_rfps, prioritize_rfps, prepare_sales_summary
+from src.technical_agent import load_skus, build_catalog, MatchCache
+from src.pricing_agent import total_test_cost, iter_pricing
+from src.orchestrator import technical_pricing_job, rfp_decision, priority_score, DEFAULT_VALUE_INR
+from src.job_queue import JobQueue, DEFAULT_LEASE_S
+from src.results_store import ResultsStore, stored_match_count
+from src.summary_export import SummaryWriter
+from src.mto_agent import generate_mto_request, estimate_mto_pricing, json_default
+from src.similarity_index import SkuSimilarityIndex
+from utils.doc_profiler import file_sha256
+
+RFP_SALES_FOLDER = "data/rfps_sales"
+SKU_PATH = "data/skus/SKUs.xlsx"
+TEST_PRICE_PATH = "data/pricing/test_prices.xlsx"
+QUEUE_DB = "data/jobs.db"
+# Set RFP_QUEUE_SHARED=1 on every host when QUEUE_DB is on a network
+# file system (see JobQueue: rollback journal instead of WAL)
+QUEUE_SHARED = os.environ.get("RFP_QUEUE_SHARED") == "1"
+RESULTS_DB = "data/results.db"
+EXPORT_DIR = "data/exports"
+
+LOCAL_WORKERS = 2
+IDLE_POLL_S = 1.0
+
+
+# -------------------------------------------------
+# Coordinator
+# -------------------------------------------------
+def new_batch_id() -> str:
+    # Sorts by creation time (see JobQueue.latest_batch)
+    return f"{datetime.now():%Y%m%dT%H%M%S.%f}-{os.getpid()}"
+
+
+def enqueue_rfps(queue: JobQueue, rfps: list, catalog_version: str, batch_id: str) -> int:
+    """
+    One job per RFP document revision and SKU master, ordered by the
+    same priority score as the in-process scheduler
+
+    The job id is rfp_id | path | document hash | catalog version: an
+    unchanged document is not redone, while an edited document or a new
+    SKU master gets a new job.
+    """
+    max_value = max((r.get("estimated_value") or DEFAULT_VALUE_INR for r in rfps), default=1)
+    max_pages = max((r.get("page_count") or 1 for r in rfps), default=1)
+    today = datetime.today()
+
+    jobs = []
+    for rfp in rfps:
+        doc_sha256 = file_sha256(rfp["path"])
+        payload = dict(
+            rfp,
+            due_date=rfp["due_date"].isoformat() if rfp.get("due_date") else None,
+            doc_sha256=doc_sha256,
+            doc_mtime=os.path.getmtime(rfp["path"]),
+            catalog_version=catalog_version
+        )
+        job_id = f"{rfp['rfp_id']}|{rfp['path']}|{doc_sha256[:16]}|{catalog_version}"
+        jobs.append((job_id, payload, priority_score(rfp, max_value, max_pages, today)))
+
+    return queue.enqueue(jobs, batch_id)
+
+
+def run_coordinator(queue_path: str = QUEUE_DB) -> str:
+    """
+    Scans and enqueues a new batch; returns its batch_id
+    """
+    rfps = prioritize_rfps(deduplicate_rfps(scan_rfps(RFP_SALES_FOLDER)), days=90)
+    selected_pdfs = [r for r in rfps if r["source"] == "PDF"]
+    catalog = build_catalog(load_skus(SKU_PATH))
+    batch_id = new_batch_id()
+
+    queue = JobQueue(queue_path, shared=QUEUE_SHARED)
+    pending = enqueue_rfps(queue, selected_pdfs, catalog.version, batch_id)
+    print(
+        f"[Coordinator] Batch {batch_id}: {pending} of {len(selected_pdfs)} RFP(s) to process; "
+        f"queue: {queue.counts()}"
+    )
+    queue.close()
+    return batch_id
+
+
+# -------------------------------------------------
+# Worker
+# -------------------------------------------------
+class LeaseLost(Exception):
+    pass
+
+
+def process_job(payload: dict, catalog, sim_index: SkuSimilarityIndex, test_cost: float,
+                match_cache: MatchCache, heartbeat) -> dict:
+    """
+    Runs technical_pricing_job for one RFP, calling heartbeat() at every
+    step; returns a JSON-ready result. When the decision triggers MTO,
+    the result carries the MTO request and its estimate line instead of
+    standard SKU pricing (as in the app).
+    """
+    rfp = dict(payload)
+    if rfp.get("due_date"):
+        rfp["due_date"] = datetime.fromisoformat(rfp["due_date"])
+
+    quantity_km = prepare_sales_summary(rfp)["pricing_summary"]["quantity_km"]
+    job = technical_pricing_job(rfp, catalog, quantity_km, test_cost, match_cache=match_cache)
+
+    try:
+        while True:
+            next(job)
+            if not heartbeat():
+                job.close()
+                raise LeaseLost(rfp["rfp_id"])
+    except StopIteration as stop:
+        result = stop.value
+
+    matches = result["matches"]
+    rfp_specs = result["rfp_specs"]
+    decision = rfp_decision(matches, rfp_specs)
+
+    mto_request = None
+    if decision["mto_triggered"]:
+        closest_sku = sim_index.closest_skus(rfp_specs, k=1)[0]
+        mto_request = generate_mto_request(rfp, rfp_specs, closest_sku, catalog)
+        pricing = [estimate_mto_pricing(closest_sku, quantity_km)]
+    else:
+        pricing = [
+            {
+                "sku_id": p.sku_id,
+                "classification": p.match_classification,
+                "material_cost": p.material_cost,
+                "test_cost": p.test_cost,
+                "total_cost": p.total_cost
+            }
+            for p in iter_pricing(result["pricing"], catalog)
+        ]
+
+    return {
+        "rfp_specs": rfp_specs,
+        "catalog_version": catalog.version,
+        "decision": decision,
+        "match_rows": [
+            {
+                "sku_id": m.sku_id,
+                "spec_match_pct": m.spec_match_pct,
+                "classification": m.match_classification,
+                "unit_price": m.unit_price
+            }
+            for m in matches.top(stored_match_count(matches))
+        ],
+        "pricing": pricing,
+        "mto_request": mto_request
+    }
+
+
+def run_worker(queue_path: str = QUEUE_DB, worker_id: str = None, lease_s: float = DEFAULT_LEASE_S,
+               exit_when_drained: bool = True) -> int:
+    """
+    Leases and processes jobs until the queue has nothing pending or
+    leased (or forever, if exit_when_drained is False); the catalog is
+    loaded once per worker. Returns the number of jobs completed.
+    """
+    worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+    queue = JobQueue(queue_path, shared=QUEUE_SHARED)
+    catalog = build_catalog(load_skus(SKU_PATH))
+    sim_index = SkuSimilarityIndex(catalog.df)
+    test_cost = total_test_cost(TEST_PRICE_PATH)
+    match_cache = MatchCache()
+    done = 0
+
+    # Heartbeat at most every lease_s / 3 so long documents keep their lease
+    heartbeat_every = lease_s / 3
+
+    while True:
+        leased = queue.lease(worker_id, lease_s)
+        if leased is None:
+            if exit_when_drained and queue.is_drained():
+                break
+            time.sleep(IDLE_POLL_S)
+            continue
+
+        job_id, payload = leased
+        last_beat = time.monotonic()
+
+        def heartbeat() -> bool:
+            nonlocal last_beat
+            if time.monotonic() - last_beat < heartbeat_every:
+                return True
+            last_beat = time.monotonic()
+            return queue.heartbeat(job_id, worker_id, lease_s)
+
+        try:
+            result = process_job(payload, catalog, sim_index, test_cost, match_cache, heartbeat)
+        except LeaseLost:
+            print(f"[Worker {worker_id}] Lease lost on {job_id}; abandoning")
+            continue
+        except Exception as e:
+            queue.fail(job_id, worker_id, f"{type(e).__name__}: {e}")
+            print(f"[Worker {worker_id}] Failed {job_id}: {e}")
+            continue
+
+        if queue.complete(job_id, worker_id, result, default=json_default):
+            done += 1
+            print(f"[Worker {worker_id}] Done {job_id}")
+
+    queue.close()
+    return done
+
+
+# -------------------------------------------------
+# Merge
+# -------------------------------------------------
+def merge_results(queue: JobQueue, store: ResultsStore, writer: SummaryWriter = None, batch_id: str = None) -> int:
+    """
+    Writes the completed jobs of batch_id (all batches if None) into the
+    results store (one transaction) and, optionally, the summary
+    exports; returns the number merged
+    """
+    rfps, results = [], []
+    for _, payload, result in queue.iter_results(batch_id):
+        rfps.append(payload)
+        results.append({
+            "rfp_id": payload["rfp_id"],
+            "rfp_specs": result["rfp_specs"],
+            "decision": result["decision"],
+            "match_rows": result["match_rows"],
+            "extra_pricing": result["pricing"],
+            "mto_request": result.get("mto_request"),
+            "doc_path": payload.get("path"),
+            "doc_mtime": payload.get("doc_mtime"),
+            "catalog_version": result.get("catalog_version")
+        })
+        if writer:
+            writer.write_result(payload, result["decision"], extra_pricing=result["pricing"])
+
+    store.upsert_rfps(rfps)
+    store.save_results(results)
+
+    for job in queue.failed(batch_id):
+        print(f"[Coordinator] {job['job_id']} failed after {job['attempts']} attempt(s): {job['error']}")
+
+    return len(results)
+
+
+def run_merge(queue_path: str = QUEUE_DB, batch_id: str = None) -> int:
+    """
+    Merges batch_id, by default the latest batch enqueued
+    """
+    queue = JobQueue(queue_path, shared=QUEUE_SHARED)
+    batch_id = batch_id or queue.latest_batch()
+    store = ResultsStore(RESULTS_DB)
+    with SummaryWriter(EXPORT_DIR) as writer:
+        merged = merge_results(queue, store, writer, batch_id)
+    print(
+        f"[Coordinator] Merged {merged} result(s) of batch {batch_id} into {RESULTS_DB}; "
+        f"exports: {', '.join(writer.paths)}"
+    )
+    store.close()
+    queue.close()
+    return merged
+
+
+def run_local(workers: int = LOCAL_WORKERS, queue_path: str = QUEUE_DB):
+    """
+    Coordinator plus worker processes on this machine
+    """
+    batch_id = run_coordinator(queue_path)
+
+    ctx = mp.get_context("spawn")
+    procs = [ctx.Process(target=run_worker, args=(queue_path, f"local-{i}")) for i in range(workers)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join()
+
+    run_merge(queue_path, batch_id)
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "run"
+    args = sys.argv[2:]
+
+    if command == "enqueue":
+        run_coordinator(*args[:1])
+    elif command == "worker":
+        run_worker(*args[:2])
+    elif command == "merge":
+        run_merge(*args[:2])
+    elif command == "run":
+        run_local(int(args[0]) if args else LOCAL_WORKERS)
+    else:
+        sys.exit(__doc__)
@@ -1,81 +1,43 @@
-from src.sales_agent import scan_rfps, prioritize_rfps, prepare_sales_summary
-from utils.pdf_reader import extract_full_text
-from utils.section_finder import find_section
-from utils.normalizer import (
-    extract_voltage,
-    extract_conductor,
-    extract_insulation,
-    extract_cores,
-    extract_armouring
-)
-
-from src.technical_agent import (
-    load_skus,
-    compute_spec_match,
-    build_comparison_table,
-    classify_match
-)
-
-from src.pricing_agent import compute_pricing
+import os
+import sys
+
+from src.sales_agent import scan_rfps, deduplicate_rfps, prioritize_rfps, prepare_sales_summary
+from src.technical_agent import load_skus, build_catalog, matches_to_frame, MatchCache
+from src.pricing_agent import total_test_cost, pricing_to_frame
+from src.orchestrator import RfpScheduler, technical_pricing_job, rfp_decision
+from src.summary_export import SummaryWriter
+from src.mto_agent import estimate_mto_pricing, MtoRequestWriter, MTO_PREMIUM_PCT
+from src.similarity_index import SkuSimilarityIndex
+from utils.doc_profiler import DocumentProfiler, PROFILE_DIR, SLOW_DOC_THRESHOLD_S
 
 
 RFP_SALES_FOLDER = "data/rfps_sales"
 SKU_PATH = "data/skus/SKUs.xlsx"
 TEST_PRICE_PATH = "data/pricing/test_prices.xlsx"
+MAX_WORKERS = 2
+EXPORT_DIR = "data/exports"
+RESULTS_DB = "data/results.db"
+QUANTITY_KM = 10
 
 
-def run_pipeline():
-    print("\n=== SALES AGENT: SCANNING RFP SOURCES ===")
-
-    rfps = scan_rfps(RFP_SALES_FOLDER)
-
-    prioritized = prioritize_rfps(rfps, days=90)
-    selected_pdf = next((r for r in prioritized if r["source"] == "PDF"), None)
-
-    if not selected_pdf:
-        print("\n[Main Agent] No full RFP document available yet.")
+def report_rfp(rfp: dict, result: dict, error: Exception, catalog, decision: dict):
+    if error:
+        print(f"\n[Main Agent] Processing failed for {rfp['rfp_id']}: {error}")
         return
 
-    print("\n=== SALES AGENT: SELECTED RFP ===")
-    print(selected_pdf)
+    print(f"\n=== RFP: {rfp['rfp_id']} (due {rfp['due_date'].date()}) ===")
 
-    # -----------------------------
-    # MAIN AGENT: PREPARE SUMMARIES
-    # -----------------------------
-    sales_summary = prepare_sales_summary(selected_pdf)
-
-    # -----------------------------
-    # TECHNICAL AGENT
-    # -----------------------------
-    rfp_text = extract_full_text(sales_summary["technical_summary"]["document_path"])
-
-    tech_section = find_section(
-        rfp_text,
-        ["technical requirements", "scope of supply"],
-        ["integration approach", "security"]
-    )
-
-    rfp_specs = {
-        "voltage_kV": extract_voltage(tech_section),
-        "conductor": extract_conductor(tech_section),
-        "insulation": extract_insulation(tech_section),
-        "cores": extract_cores(tech_section),
-        "armoured": extract_armouring(tech_section)
-    }
-
-    sku_df = load_skus(SKU_PATH)
-    match_df = classify_match(compute_spec_match(sku_df, rfp_specs))
+    rfp_specs = result["rfp_specs"]
+    matches = result["matches"]
 
     print("\n[Technical Agent] Match Results:")
-    print(match_df[["SKU_ID", "spec_match_pct", "match_classification"]])
+    print(matches_to_frame(matches)[["SKU_ID", "spec_match_pct", "match_classification"]])
 
     # -----------------------------
-    # NO_MATCH HANDLING (KEY ADDITION)
+    # NO_MATCH / VOLTAGE MISMATCH HANDLING (KEY ADDITION)
     # -----------------------------
-    no_match_rows = match_df[match_df["match_classification"] == "NO_MATCH"]
-
-    if not no_match_rows.empty:
-        print("\n[Main Agent] NO_MATCH detected.")
+    if decision["mto_triggered"]:
+        print("\n[Main Agent] No suitable standard SKU (NO_MATCH or mandatory voltage class mismatch).")
         print("[Main Agent] Triggering Made-to-Order (MTO) workflow.")
 
         print("[Engineering] Action: Assess feasibility for custom SKU.")
@@ -83,20 +45,127 @@ def run_pipeline():
         print(rfp_specs)
 
         print("[Pricing] Action: Creating preliminary estimate for custom SKU.")
-        print("[Pricing] Assumption: +25% premium over closest standard SKU.")
+        print(f"[Pricing] Assumption: +{MTO_PREMIUM_PCT}% premium over closest standard SKU.")
+        return
+
+    print("\n=== FINAL CONSOLIDATED RFP RESPONSE ===")
+    print(pricing_to_frame(result["pricing"], catalog))
+
+
+def export_rfp(writer: SummaryWriter, rfp: dict, result: dict, catalog, decision: dict, closest_sku: dict):
+    """
+    Same output as the app: standard SKU pricing, or only the MTO
+    estimate line when the decision triggers MTO
+    """
+    if decision["mto_triggered"]:
+        quantity_km = prepare_sales_summary(rfp)["pricing_summary"]["quantity_km"]
+        writer.write_result(rfp, decision, extra_pricing=[estimate_mto_pricing(closest_sku, quantity_km)])
+    else:
+        writer.write_result(rfp, decision, priced=result["pricing"], catalog=catalog)
+
+
+def run_pipeline(workers: int = MAX_WORKERS, profile: bool = False, slow_doc_threshold_s: float = SLOW_DOC_THRESHOLD_S):
+    print("\n=== SALES AGENT: SCANNING RFP SOURCES ===")
+
+    rfps = deduplicate_rfps(scan_rfps(RFP_SALES_FOLDER))
+
+    prioritized = prioritize_rfps(rfps, days=90)
+    selected_pdfs = [r for r in prioritized if r["source"] == "PDF"]
+
+    if not selected_pdfs:
+        print("\n[Main Agent] No full RFP document available yet.")
+        return
+
+    print("\n=== SALES AGENT: SELECTED RFPs ===")
+    for rfp in selected_pdfs:
+        print(rfp)
 
     # -----------------------------
-    # PRICING AGENT (STANDARD SKUs)
+    # TECHNICAL + PRICING AGENTS (PRIORITY SCHEDULED)
     # -----------------------------
-    pricing_df = compute_pricing(
-        matched_df=match_df,
-        quantity_km=sales_summary["pricing_summary"]["quantity_km"],
-        test_price_path=TEST_PRICE_PATH
-    )
-
-    print("\n=== FINAL CONSOLIDATED RFP RESPONSE ===")
-    print(pricing_df)
+    catalog = build_catalog(load_skus(SKU_PATH))
+    sim_index = SkuSimilarityIndex(catalog.df)
+    test_cost = total_test_cost(TEST_PRICE_PATH)
+    profiler = DocumentProfiler(PROFILE_DIR, slow_doc_threshold_s) if profile else None
+    match_cache = MatchCache()
+
+    def job(rfp):
+        sales_summary = prepare_sales_summary(rfp)
+        return technical_pricing_job(
+            rfp,
+            catalog,
+            quantity_km=sales_summary["pricing_summary"]["quantity_km"],
+            test_cost=test_cost,
+            profiler=profiler,
+            match_cache=match_cache
+        )
+
+    def on_result(rfp, result, error):
+        if error:
+            report_rfp(rfp, result, error, catalog, None)
+            return
+
+        decision = rfp_decision(result["matches"], result["rfp_specs"])
+        closest_sku = None
+        if decision["mto_triggered"]:
+            closest_sku = sim_index.closest_skus(result["rfp_specs"], k=1)[0]
+            mto_writer.write(rfp, result["rfp_specs"], closest_sku)
+
+        report_rfp(rfp, result, error, catalog, decision)
+        export_rfp(writer, rfp, result, catalog, decision, closest_sku)
+
+    # Summaries and MTO requests (engineering queue) are streamed to disk
+    # as each RFP completes
+    mto_path = os.path.join(EXPORT_DIR, "mto_requests.jsonl")
+    with SummaryWriter(EXPORT_DIR) as writer, MtoRequestWriter(mto_path, catalog) as mto_writer:
+        scheduler = RfpScheduler(job, workers=workers)
+        scheduler.run(selected_pdfs, on_result=on_result)
+
+    print("\n[Main Agent] Summaries exported to: " + ", ".join(writer.paths))
+
+    if mto_writer.written:
+        print(f"[MTO Agent] Wrote {mto_writer.written} MTO request(s) to {mto_path}")
+
+    print(f"[Main Agent] Match cache: {match_cache.stats()}")
+
+    if profiler:
+        print("\n=== DOCUMENT TIMINGS ===")
+        for report in sorted(profiler.reports, key=lambda r: -r["elapsed_s"]):
+            print(report)
+
+
+def run_rematch(old_sku_path: str, new_sku_path: str = SKU_PATH):
+    """
+    Re-evaluates the RFPs in the results store against an updated SKU
+    master: python main.py rematch <old SKUs.xlsx> [new SKUs.xlsx]
+    """
+    from src.catalog_agent import rematch_rfps
+    from src.results_store import ResultsStore
+
+    store = ResultsStore(RESULTS_DB)
+    try:
+        repriced = rematch_rfps(
+            store,
+            old_df=load_skus(old_sku_path),
+            new_df=load_skus(new_sku_path),
+            quantity_km=QUANTITY_KM,
+            test_cost=total_test_cost(TEST_PRICE_PATH)
+        )
+    finally:
+        store.close()
+
+    for rfp_id in repriced:
+        print(f"[Main Agent] Repriced {rfp_id}")
 
 
 if __name__ == "__main__":
-    run_pipeline()
+    if sys.argv[1:2] == ["rematch"]:
+        if len(sys.argv) < 3:
+            sys.exit("usage: python main.py rematch <old SKUs.xlsx> [new SKUs.xlsx]")
+        run_rematch(*sys.argv[2:4])
+    else:
+        # Opt-in: RFP_PROFILE=1 [RFP_SLOW_DOC_SECONDS=10] python main.py
+        run_pipeline(
+            profile=os.environ.get("RFP_PROFILE") == "1",
+            slow_doc_threshold_s=float(os.environ.get("RFP_SLOW_DOC_SECONDS", SLOW_DOC_THRESHOLD_S))
+        )
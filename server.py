@@ -0,0 +1,327 @@
+"""
+Warm local matching service
+
+Keeps the SKU catalog, test price total and spec-extraction cache in
+memory so each request only pays for matching and pricing.
+
+Endpoints (JSON in / JSON out):
+  GET  /health
+  GET  /metrics   request counts, concurrency and latency percentiles
+  POST /match     {"rfp_specs": {...}, "rfp_id"?, "due_date"?, "quantity_km"?, "top_n"?}
+  POST /rfp       {"path": "<pdf under RFP_DIR>", ...} or a raw PDF body (Content-Type: application/pdf)
+  POST /reload    reload SKU master and test prices from disk
+
+Usage: python server.py [port]
+"""
+import hashlib
+import io
+import json
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from utils.pdf_reader import extract_full_text
+from src.orchestrator import extract_rfp_specs
+from src.technical_agent import load_skus, build_catalog, MatchCache
+from src.pricing_agent import total_test_cost, price_matches, iter_pricing
+from src.mto_agent import generate_mto_request, is_voltage_mismatch, json_default
+from src.similarity_index import SkuSimilarityIndex
+
+SKU_PATH = "data/skus/SKUs.xlsx"
+TEST_PRICE_PATH = "data/pricing/test_prices.xlsx"
+RFP_DIR = "data/rfps_sales"  # the only directory /rfp {"path"} may read from
+QUANTITY_KM = 10
+TOP_N = 3
+
+HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+LATENCY_WINDOW = 1000
+SPEC_CACHE_SIZE = 256  # extracted documents kept, least recently used dropped first
+
+
+# -------------------------------------------------
+# Metrics
+# -------------------------------------------------
+class ServiceMetrics:
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self._lock = threading.Lock()
+        self._window = window
+        self.requests = {}
+        self.errors = {}
+        self.latencies_ms = {}
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def start(self):
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+    def finish(self, endpoint: str, elapsed_ms: float, ok: bool):
+        with self._lock:
+            self.in_flight -= 1
+            self.requests[endpoint] = self.requests.get(endpoint, 0) + 1
+            if not ok:
+                self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+            self.latencies_ms.setdefault(endpoint, deque(maxlen=self._window)).append(elapsed_ms)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            endpoints = {}
+            for endpoint, samples in self.latencies_ms.items():
+                ordered = sorted(samples)
+                endpoints[endpoint] = {
+                    "requests": self.requests.get(endpoint, 0),
+                    "errors": self.errors.get(endpoint, 0),
+                    "p50_ms": round(ordered[len(ordered) // 2], 3),
+                    "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 3),
+                    "max_ms": round(ordered[-1], 3)
+                }
+
+            return {
+                "in_flight": self.in_flight,
+                "max_in_flight": self.max_in_flight,
+                "endpoints": endpoints
+            }
+
+
+# -------------------------------------------------
+# Warm state
+# -------------------------------------------------
+class MatchingService:
+    """
+    Catalog, test cost, a bounded (LRU) document-hash -> rfp_specs cache and a
+    spec-signature match cache shared by all request threads
+    """
+
+    def __init__(self, sku_path: str = SKU_PATH, test_price_path: str = TEST_PRICE_PATH,
+                 spec_cache_size: int = SPEC_CACHE_SIZE, rfp_dir: str = RFP_DIR):
+        self.sku_path = sku_path
+        self.test_price_path = test_price_path
+        self.rfp_dir = os.path.realpath(rfp_dir)
+        self.metrics = ServiceMetrics()
+        self.spec_cache_size = spec_cache_size
+        self._spec_cache = OrderedDict()
+        self.match_cache = MatchCache()
+        self._lock = threading.Lock()
+        self.reload()
+
+    def reload(self) -> dict:
+        catalog = build_catalog(load_skus(self.sku_path))
+        sim_index = SkuSimilarityIndex(catalog.df)
+        test_cost = total_test_cost(self.test_price_path)
+
+        # Swap together so in-flight requests see a consistent set
+        with self._lock:
+            self.catalog, self.sim_index, self.test_cost = catalog, sim_index, test_cost
+            self._spec_cache.clear()
+
+        return {"skus": len(catalog.sku_ids), "test_cost": test_cost}
+
+    def read_rfp(self, path: str) -> bytes:
+        """
+        Reads a document named by a client (relative to the working
+        directory, as before); the resolved path, with symlinks and ".."
+        followed, must stay inside rfp_dir
+        """
+        if not isinstance(path, str):
+            raise ValueError("path must be a string")
+        resolved = os.path.realpath(path)
+        if os.path.commonpath([resolved, self.rfp_dir]) != self.rfp_dir:
+            raise PermissionError(f"path is outside the RFP directory: {path}")
+
+        with open(resolved, "rb") as f:
+            return f.read()
+
+    def specs_for_document(self, data: bytes) -> tuple:
+        doc_hash = hashlib.sha256(data).hexdigest()
+
+        with self._lock:
+            cached = self._spec_cache.get(doc_hash)
+            if cached is not None:
+                self._spec_cache.move_to_end(doc_hash)
+                return cached, True
+
+        rfp_specs = extract_rfp_specs(extract_full_text(io.BytesIO(data)))
+        with self._lock:
+            self._spec_cache[doc_hash] = rfp_specs
+            self._spec_cache.move_to_end(doc_hash)
+            while len(self._spec_cache) > self.spec_cache_size:
+                self._spec_cache.popitem(last=False)
+
+        return rfp_specs, False
+
+    def spec_cache_stats(self) -> dict:
+        with self._lock:
+            return {"size": len(self._spec_cache), "maxsize": self.spec_cache_size}
+
+    def evaluate(self, rfp_meta: dict, rfp_specs: dict, quantity_km: float, top_n: int) -> dict:
+        with self._lock:
+            catalog, sim_index, test_cost = self.catalog, self.sim_index, self.test_cost
+
+        matches = self.match_cache.match(catalog, rfp_specs)
+        best = matches.record(0)
+        best_sku = catalog.df.iloc[best.row].to_dict()
+
+        voltage_mismatch = is_voltage_mismatch(rfp_specs, best_sku)
+        mto_triggered = best.match_classification == "NO_MATCH" or voltage_mismatch
+
+        response = {
+            "rfp_id": rfp_meta.get("rfp_id"),
+            "rfp_specs": rfp_specs,
+            "matches": [
+                {
+                    "SKU_ID": m.sku_id,
+                    "spec_match_pct": m.spec_match_pct,
+                    "match_classification": m.match_classification,
+                    "Unit_Price_per_km_INR": m.unit_price
+                }
+                for m in matches.top(top_n)
+            ],
+            "mto_triggered": mto_triggered,
+            "voltage_mismatch": voltage_mismatch,
+            "pricing": [],
+            "mto_request": None
+        }
+
+        if mto_triggered:
+            closest_sku = sim_index.closest_skus(rfp_specs, k=1)[0]
+            response["mto_request"] = generate_mto_request(rfp_meta, rfp_specs, closest_sku, catalog)
+        else:
+            response["pricing"] = [
+                {
+                    "SKU_ID": r.sku_id,
+                    "match_classification": r.match_classification,
+                    "material_cost": r.material_cost,
+                    "test_cost": r.test_cost,
+                    "total_cost": r.total_cost
+                }
+                for r in iter_pricing(price_matches(matches, quantity_km, test_cost), catalog)
+            ]
+
+        return response
+
+
+# -------------------------------------------------
+# HTTP layer
+# -------------------------------------------------
+class MatchingRequestHandler(BaseHTTPRequestHandler):
+    service = None  # set by make_server
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, payload: dict):
+        body = json.dumps(payload, default=json_default).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_body(self) -> bytes:
+        return self.rfile.read(int(self.headers.get("Content-Length") or 0))
+
+    def _dispatch(self, routes: dict):
+        # Metrics are keyed on the route, not the raw path, so arbitrary
+        # URLs can't grow the metrics tables
+        path = self.path.split("?", 1)[0]
+        route = path if path in routes else "unknown"
+        handler = routes.get(path, lambda: (404, {"error": "not found"}))
+
+        metrics = self.service.metrics
+        metrics.start()
+        start = time.perf_counter()
+        ok = False
+        try:
+            status, payload = handler()
+            ok = status < 400
+        except KeyError as e:
+            status, payload = 400, {"error": f"missing field: {e.args[0]}"}
+        except ValueError as e:
+            status, payload = 400, {"error": str(e)}
+        except PermissionError as e:
+            status, payload = 403, {"error": str(e)}
+        except FileNotFoundError:
+            status, payload = 404, {"error": "no such document"}
+        except Exception as e:
+            status, payload = 500, {"error": str(e)}
+        finally:
+            metrics.finish(f"{self.command} {route}", (time.perf_counter() - start) * 1000, ok)
+
+        self._send(status, payload)
+
+    def do_GET(self):
+        routes = {
+            "/health": lambda: (200, {"status": "ok"}),
+            "/metrics": lambda: (200, dict(
+                self.service.metrics.snapshot(),
+                match_cache=self.service.match_cache.stats(),
+                spec_cache=self.service.spec_cache_stats()
+            ))
+        }
+        self._dispatch(routes)
+
+    def do_POST(self):
+        routes = {
+            "/match": self._match,
+            "/rfp": self._rfp,
+            "/reload": lambda: (200, self.service.reload())
+        }
+        self._dispatch(routes)
+
+    def _json_body(self) -> dict:
+        request = json.loads(self._read_body() or b"{}")
+        if not isinstance(request, dict):
+            raise ValueError("request body must be a JSON object")
+        return request
+
+    def _options(self, request: dict) -> tuple:
+        rfp_meta = {"rfp_id": request.get("rfp_id"), "due_date": request.get("due_date")}
+        return rfp_meta, float(request.get("quantity_km", QUANTITY_KM)), int(request.get("top_n", TOP_N))
+
+    def _match(self):
+        request = self._json_body()
+        rfp_specs = request["rfp_specs"]
+        if not isinstance(rfp_specs, dict):
+            raise ValueError("rfp_specs must be a JSON object")
+        rfp_meta, quantity_km, top_n = self._options(request)
+        return 200, self.service.evaluate(rfp_meta, rfp_specs, quantity_km, top_n)
+
+    def _rfp(self):
+        if self.headers.get("Content-Type") == "application/pdf":
+            data, request = self._read_body(), {}
+        else:
+            request = self._json_body()
+            data = self.service.read_rfp(request["path"])
+
+        rfp_specs, cached = self.service.specs_for_document(data)
+        rfp_meta, quantity_km, top_n = self._options(request)
+
+        response = self.service.evaluate(rfp_meta, rfp_specs, quantity_km, top_n)
+        response["extraction_cached"] = cached
+        return 200, response
+
+
+def make_server(port: int = DEFAULT_PORT, service: MatchingService = None) -> ThreadingHTTPServer:
+    """
+    Builds (but does not start) a threaded server bound to localhost;
+    port 0 picks a free port (see server.server_address)
+    """
+    handler = type("BoundHandler", (MatchingRequestHandler,), {"service": service or MatchingService()})
+    return ThreadingHTTPServer((HOST, port), handler)
+
+
+if __name__ == "__main__":
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_PORT
+    server = make_server(port)
+    print(f"[Service] Matching service warm on http://{HOST}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -0,0 +1,240 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+
+from src.technical_agent import (
+    MATCH_FIELDS,
+    PARTIAL_MATCH_PCT,
+    build_catalog,
+    match_catalog,
+    count_matches,
+    rank_rows,
+    MatchResult
+)
+from src.pricing_agent import price_matches
+from src.orchestrator import rfp_decision
+from src.results_store import MATCHES_STORED_PER_RFP
+from src.mto_agent import generate_mto_request, estimate_mto_pricing
+
+SKU_KEY = "SKU_ID"
+ELIGIBLE_CLASSES = ["STRONG_MATCH", "PARTIAL_MATCH"]
+
+# Highest matched-field count that still classifies as NO_MATCH
+NO_MATCH_MAX_COUNT = max(
+    c for c in range(len(MATCH_FIELDS) + 1) if c * 100 / len(MATCH_FIELDS) < PARTIAL_MATCH_PCT
+)
+
+
+# -------------------------------------------------
+# Diff two versions of the SKU master
+# -------------------------------------------------
+def _check_unique_ids(df: pd.DataFrame, name: str):
+    dupes = df[SKU_KEY][df[SKU_KEY].duplicated()].unique()
+    if len(dupes):
+        raise ValueError(f"Duplicate SKU_ID(s) in the {name} SKU master: {', '.join(map(str, dupes[:10]))}")
+
+
+def diff_catalogs(old_df: pd.DataFrame, new_df: pd.DataFrame) -> dict:
+    """
+    Compares two SKU masters by SKU_ID
+
+    Returns lists of SKU_IDs that were added, changed (any column present
+    in both masters) or removed. One outer merge and one vectorized
+    comparison per column; raises ValueError on duplicate SKU_IDs.
+    """
+    import numpy as np
+
+    _check_unique_ids(old_df, "old")
+    _check_unique_ids(new_df, "new")
+
+    # Compared as strings, before the merge can turn int columns into float
+    columns = [c for c in new_df.columns if c in old_df.columns and c != SKU_KEY]
+    old = old_df[[SKU_KEY] + columns].astype({c: str for c in columns})
+    new = new_df[[SKU_KEY] + columns].astype({c: str for c in columns})
+
+    merged = old.merge(new, on=SKU_KEY, how="outer", suffixes=("_old", "_new"), indicator=True)
+    both = merged[merged["_merge"] == "both"]
+
+    differs = np.zeros(len(both), dtype=bool)
+    for c in columns:
+        differs |= both[f"{c}_old"].to_numpy() != both[f"{c}_new"].to_numpy()
+
+    return {
+        "added": merged.loc[merged["_merge"] == "right_only", SKU_KEY].tolist(),
+        "changed": both.loc[differs, SKU_KEY].tolist(),
+        "removed": merged.loc[merged["_merge"] == "left_only", SKU_KEY].tolist()
+    }
+
+
+# -------------------------------------------------
+# Re-match a single stored RFP
+# -------------------------------------------------
+def _priced_matches(rows) -> list:
+    return [(sku_id, cls, price) for sku_id, cls, price in rows if cls in ELIGIBLE_CLASSES]
+
+
+def rematch_rfp(rfp_specs: dict, stored_matches: list, catalog, sku_rows: pd.Index, fresh_rows: np.ndarray,
+                old_size: int) -> MatchResult:
+    """
+    Re-ranks one stored document against the new catalog, scoring only
+    the added / changed SKUs
+
+    stored_matches are the document's ResultsStore.top_matches rows (the
+    top of the old ranking, including every priced match); sku_rows is a
+    pandas Index of the new catalog's SKU_IDs and fresh_rows the new
+    catalog rows of the added / changed SKUs. Removed and changed SKUs
+    are dropped from the stored ranking and the fresh rows, scored
+    against rfp_specs, merged in.
+
+    Unchanged SKUs that weren't stored rank below every stored one, so
+    the merged ranking is cut where one of them could come next; if that
+    leaves fewer rows than the store keeps, the whole catalog is ranked.
+    """
+    import numpy as np
+
+    if not stored_matches:
+        return match_catalog(catalog, rfp_specs)
+
+    stored_ids = np.array([m["sku_id"] for m in stored_matches], dtype=object)
+    stored_counts = np.rint(
+        np.array([m["spec_match_pct"] for m in stored_matches]) * len(MATCH_FIELDS) / 100
+    ).astype(np.int8)
+
+    # Removed SKUs aren't in the new catalog (-1); changed ones are rescored
+    stored_rows = sku_rows.get_indexer(stored_ids)
+    dirty = np.zeros(len(catalog.sku_ids), dtype=bool)
+    dirty[fresh_rows] = True
+    keep = stored_rows >= 0
+    keep[keep] = ~dirty[stored_rows[keep]]
+
+    kept_rows = stored_rows[keep]
+    kept_counts = stored_counts[keep]
+
+    matches = rank_rows(
+        catalog,
+        np.concatenate([kept_rows, fresh_rows]),
+        np.concatenate([kept_counts, count_matches(catalog, rfp_specs, fresh_rows)])
+    )
+
+    if len(stored_matches) < old_size:
+        # Best count an unstored SKU can have: no more than the last
+        # stored row, and NO_MATCH when every priced match was stored
+        unstored_max = int(stored_counts[-1])
+        if stored_matches[-1]["classification"] in ELIGIBLE_CLASSES:
+            unstored_max = min(unstored_max, NO_MATCH_MAX_COUNT)
+
+        ranked = matches.ranked
+        safe = ranked["matched_count"] > unstored_max
+        is_kept = np.isin(ranked["row"], kept_rows)
+        if is_kept.any():
+            safe[:np.flatnonzero(is_kept)[-1] + 1] = True
+        cut = len(safe) if safe.all() else int(np.argmin(safe))
+        matches = MatchResult(ranked[:cut], catalog)
+
+    if len(matches) < min(MATCHES_STORED_PER_RFP, len(catalog.sku_ids)):
+        matches = match_catalog(catalog, rfp_specs)
+
+    return matches
+
+
+def _is_affected(stored_matches: list, stored_decision: dict, matches, decision: dict) -> bool:
+    """
+    True when the priced (STRONG/PARTIAL) matches, their prices or the
+    decision changed; both rankings hold every priced match
+    """
+    old = _priced_matches((m["sku_id"], m["classification"], m["unit_price"]) for m in stored_matches)
+    new = _priced_matches(
+        (m.sku_id, m.match_classification, m.unit_price) for m in matches.top(matches.eligible_count())
+    )
+    if new != old or stored_decision is None:
+        return True
+    return (stored_decision["best_sku"], stored_decision["classification"]) != (
+        decision["best_sku"], decision["classification"]
+    )
+
+
+# -------------------------------------------------
+# Incremental re-evaluation for all stored RFPs
+# -------------------------------------------------
+def rematch_rfps(
+    store,
+    old_df: pd.DataFrame,
+    new_df: pd.DataFrame,
+    quantity_km: float,
+    test_cost: float
+) -> list:
+    """
+    Re-evaluates the RFPs held in a ResultsStore after a SKU master update
+
+    Nothing is rescored when the masters don't differ. Otherwise only the
+    added / changed SKUs are scored against each stored document's specs
+    and merged into its stored ranking (see rematch_rfp). Documents whose
+    priced matches or decision changed get a new decision, pricing (or
+    MTO request) saved; the rest are just marked current for the new
+    catalog version. Returns the rfp_ids that were repriced.
+    """
+    import pandas as pd
+
+    diff = diff_catalogs(old_df, new_df)
+
+    print(
+        f"[Catalog Agent] SKU master diff: {len(diff['added'])} added, "
+        f"{len(diff['changed'])} changed, {len(diff['removed'])} removed"
+    )
+
+    if not (diff["added"] or diff["changed"] or diff["removed"]):
+        return []
+
+    catalog = build_catalog(new_df)
+    sku_rows = pd.Index(catalog.sku_ids)
+    fresh_rows = sku_rows.get_indexer(diff["added"] + diff["changed"])
+    sim_index = None
+
+    results, unaffected, total = [], [], 0
+    for stored in store.iter_specs():
+        total += 1
+        rfp_id, doc_path, rfp_specs = stored["rfp_id"], stored["doc_path"], stored["rfp_specs"]
+
+        stored_matches = store.top_matches(rfp_id, None, doc_path)
+        matches = rematch_rfp(rfp_specs, stored_matches, catalog, sku_rows, fresh_rows, len(old_df))
+        decision = rfp_decision(matches, rfp_specs)
+        if not _is_affected(stored_matches, store.decision(rfp_id, doc_path), matches, decision):
+            unaffected.append((rfp_id, doc_path))
+            continue
+
+        result = {
+            "rfp_id": rfp_id,
+            "rfp_specs": rfp_specs,
+            "doc_path": doc_path,
+            "doc_mtime": stored["doc_mtime"],
+            "catalog_version": catalog.version,
+            "matches": matches,
+            "pricing": None,
+            "mto_request": None,
+            "decision": decision
+        }
+
+        if result["decision"]["mto_triggered"]:
+            if sim_index is None:
+                from src.similarity_index import SkuSimilarityIndex
+                sim_index = SkuSimilarityIndex(new_df)
+
+            closest_sku = sim_index.closest_skus(rfp_specs, k=1)[0]
+            result["mto_request"] = generate_mto_request(stored, rfp_specs, closest_sku, catalog)
+            result["extra_pricing"] = [estimate_mto_pricing(closest_sku, quantity_km)]
+        else:
+            result["pricing"] = price_matches(matches, quantity_km, test_cost)
+
+        results.append(result)
+
+    store.save_results(results)
+    store.set_catalog_version(unaffected, catalog.version)
+
+    repriced = [r["rfp_id"] for r in results]
+    print(f"[Catalog Agent] Repriced {len(repriced)} of {total} RFP(s)")
+
+    return repriced
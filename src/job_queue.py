@@ -0,0 +1,242 @@
+import json
+import sqlite3
+import time
+from contextlib import contextmanager
+
+DEFAULT_LEASE_S = 60.0
+MAX_ATTEMPTS = 3
+RETRY_BACKOFF_S = 5.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id          TEXT PRIMARY KEY,
+    batch_id        TEXT,
+    payload         TEXT NOT NULL,
+    priority        REAL NOT NULL DEFAULT 0,
+    status          TEXT NOT NULL DEFAULT 'pending',
+    attempts        INTEGER NOT NULL DEFAULT 0,
+    max_attempts    INTEGER NOT NULL,
+    available_at    REAL NOT NULL,
+    lease_owner     TEXT,
+    lease_expires   REAL,
+    result          TEXT,
+    error           TEXT,
+    enqueued_at     REAL NOT NULL,
+    updated_at      REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_ready ON jobs (status, priority DESC, enqueued_at);
+"""
+BATCH_INDEX = "CREATE INDEX IF NOT EXISTS idx_jobs_batch ON jobs (batch_id, status);"
+
+
+class JobQueue:
+    """
+    Durable work queue in a local SQLite file, shared by a coordinator
+    and any number of worker processes
+
+    Jobs move pending -> leased -> done, or back to pending (after a
+    backoff) when a worker reports a failure, until max_attempts is used
+    up and they end as failed. A lease lasts lease_s seconds and is
+    extended by heartbeat(); a job whose worker stopped heartbeating is
+    handed to the next worker that asks. complete() / fail() are only
+    accepted from the current lease owner, so a late result from a
+    worker that lost its lease is dropped.
+
+    By default the file uses WAL journaling, which needs shared memory
+    and so only works for processes on one host. For workers on other
+    hosts, every process must open the queue with shared=True: that
+    switches to the rollback journal (journal_mode=DELETE), which only
+    relies on file locks, so the file must live on a network file system
+    whose byte-range locking actually works (NFSv4, SMB with locking
+    enabled). Where that can't be guaranteed, keep the broker
+    single-host and put a service with the same methods in front of it.
+    """
+
+    def __init__(self, path: str, timeout: float = 30.0, shared: bool = False):
+        self.path = path
+        self.conn = sqlite3.connect(path, timeout=timeout, isolation_level=None, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute(f"PRAGMA journal_mode={'DELETE' if shared else 'WAL'}")
+        self.conn.executescript(SCHEMA)
+
+        # Queues created before batches existed get the column added in place
+        columns = {r["name"] for r in self.conn.execute("PRAGMA table_info(jobs)")}
+        if "batch_id" not in columns:
+            self.conn.execute("ALTER TABLE jobs ADD COLUMN batch_id TEXT")
+        self.conn.execute(BATCH_INDEX)
+
+    def close(self):
+        self.conn.close()
+
+    @contextmanager
+    def _transaction(self):
+        # IMMEDIATE takes the write lock up front, so two workers can't
+        # both select the same job before either updates it
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield self.conn
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        self.conn.execute("COMMIT")
+
+    # ---------------- Coordinator ----------------
+    def enqueue(self, jobs: list, batch_id: str = None, max_attempts: int = MAX_ATTEMPTS) -> int:
+        """
+        jobs: (job_id, payload dict, priority) tuples; higher priority is
+        leased first. All of them are tagged with batch_id (see
+        iter_results). An id already in the queue keeps its status (only
+        payload and priority are refreshed), so re-running the coordinator
+        doesn't duplicate work, except that a job that ended as failed is
+        reset for a fresh set of attempts.
+        Returns the number of jobs of the call waiting to be processed.
+        """
+        now = time.time()
+        rows = [
+            (job_id, batch_id, json.dumps(payload), priority, max_attempts, now, now, now)
+            for job_id, payload, priority in jobs
+        ]
+        with self._transaction() as conn:
+            conn.executemany(
+                """
+                INSERT INTO jobs
+                    (job_id, batch_id, payload, priority, max_attempts, available_at, enqueued_at, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (job_id) DO UPDATE SET
+                    batch_id = excluded.batch_id,
+                    payload = excluded.payload,
+                    priority = excluded.priority,
+                    attempts = CASE WHEN status = 'failed' THEN 0 ELSE attempts END,
+                    max_attempts = CASE WHEN status = 'failed' THEN excluded.max_attempts ELSE max_attempts END,
+                    available_at = CASE WHEN status = 'failed' THEN excluded.available_at ELSE available_at END,
+                    error = CASE WHEN status = 'failed' THEN NULL ELSE error END,
+                    status = CASE WHEN status = 'failed' THEN 'pending' ELSE status END,
+                    updated_at = excluded.updated_at
+                """,
+                rows
+            )
+            return sum(
+                conn.execute("SELECT status = 'pending' FROM jobs WHERE job_id = ?", (job_id,)).fetchone()[0]
+                for job_id, *_ in rows
+            )
+
+    def latest_batch(self):
+        """
+        Latest batch_id in the queue (batch ids are expected to sort by
+        creation time), or None
+        """
+        row = self.conn.execute("SELECT MAX(batch_id) AS batch_id FROM jobs").fetchone()
+        return row["batch_id"] if row else None
+
+    def counts(self) -> dict:
+        return {r["status"]: r["n"] for r in self.conn.execute(
+            "SELECT status, COUNT(*) AS n FROM jobs GROUP BY status"
+        )}
+
+    def is_drained(self) -> bool:
+        """
+        True when nothing is pending or leased
+        """
+        row = self.conn.execute(
+            "SELECT 1 FROM jobs WHERE status IN ('pending', 'leased') LIMIT 1"
+        ).fetchone()
+        return row is None
+
+    def iter_results(self, batch_id: str = None):
+        """
+        Yields (job_id, payload, result) for completed jobs, only those of
+        batch_id when given
+        """
+        sql, params = "SELECT job_id, payload, result FROM jobs WHERE status = 'done'", ()
+        if batch_id is not None:
+            sql, params = sql + " AND batch_id = ?", (batch_id,)
+        for r in self.conn.execute(sql + " ORDER BY job_id", params):
+            yield r["job_id"], json.loads(r["payload"]), json.loads(r["result"])
+
+    def failed(self, batch_id: str = None) -> list:
+        sql, params = "SELECT job_id, attempts, error FROM jobs WHERE status = 'failed'", ()
+        if batch_id is not None:
+            sql, params = sql + " AND batch_id = ?", (batch_id,)
+        return [dict(r) for r in self.conn.execute(sql + " ORDER BY job_id", params)]
+
+    # ---------------- Workers ----------------
+    def lease(self, worker_id: str, lease_s: float = DEFAULT_LEASE_S):
+        """
+        Claims the highest-priority ready job (pending, or leased by a
+        worker whose lease expired); returns (job_id, payload) or None
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            conn.execute(
+                """
+                UPDATE jobs SET status = 'failed', error = COALESCE(error, 'lease expired'), updated_at = ?
+                WHERE status = 'leased' AND lease_expires < ? AND attempts >= max_attempts
+                """,
+                (now, now)
+            )
+            row = conn.execute(
+                """
+                SELECT job_id, payload FROM jobs
+                WHERE (status = 'pending' AND available_at <= ?)
+                   OR (status = 'leased' AND lease_expires < ?)
+                ORDER BY priority DESC, enqueued_at
+                LIMIT 1
+                """,
+                (now, now)
+            ).fetchone()
+            if row is None:
+                return None
+
+            conn.execute(
+                """
+                UPDATE jobs SET status = 'leased', lease_owner = ?, lease_expires = ?,
+                    attempts = attempts + 1, updated_at = ?
+                WHERE job_id = ?
+                """,
+                (worker_id, now + lease_s, now, row["job_id"])
+            )
+        return row["job_id"], json.loads(row["payload"])
+
+    def heartbeat(self, job_id: str, worker_id: str, lease_s: float = DEFAULT_LEASE_S) -> bool:
+        """
+        Extends the lease; False means the lease was lost and the job
+        should be abandoned
+        """
+        now = time.time()
+        cur = self.conn.execute(
+            """
+            UPDATE jobs SET lease_expires = ?, updated_at = ?
+            WHERE job_id = ? AND lease_owner = ? AND status = 'leased'
+            """,
+            (now + lease_s, now, job_id, worker_id)
+        )
+        return cur.rowcount == 1
+
+    def complete(self, job_id: str, worker_id: str, result: dict, default=None) -> bool:
+        now = time.time()
+        cur = self.conn.execute(
+            """
+            UPDATE jobs SET status = 'done', result = ?, error = NULL, lease_expires = NULL, updated_at = ?
+            WHERE job_id = ? AND lease_owner = ? AND status = 'leased'
+            """,
+            (json.dumps(result, default=default), now, job_id, worker_id)
+        )
+        return cur.rowcount == 1
+
+    def fail(self, job_id: str, worker_id: str, error: str) -> bool:
+        """
+        Records a failed attempt: retried after RETRY_BACKOFF_S * attempts,
+        or marked failed once max_attempts is reached
+        """
+        now = time.time()
+        cur = self.conn.execute(
+            """
+            UPDATE jobs SET
+                status = CASE WHEN attempts >= max_attempts THEN 'failed' ELSE 'pending' END,
+                available_at = ? + ? * attempts,
+                error = ?, lease_expires = NULL, updated_at = ?
+            WHERE job_id = ? AND lease_owner = ? AND status = 'leased'
+            """,
+            (now, RETRY_BACKOFF_S, error, now, job_id, worker_id)
+        )
+        return cur.rowcount == 1
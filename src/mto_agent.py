@@ -1,28 +1,86 @@
-import pandas as pd
+from __future__ import annotations
+
+import json
+from typing import TYPE_CHECKING
+
+from src.technical_agent import MATCH_FIELDS, spec_signature
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+    from src.technical_agent import SkuCatalog
+
+# (RFP spec key, SKU column, gap table label)
+GAP_FIELDS = [
+    ("voltage_kV", "Voltage_kV", "Voltage Kv"),
+    ("conductor", "Conductor", "Conductor"),
+    ("insulation", "Insulation", "Insulation"),
+    ("cores", "Cores", "Cores"),
+    ("armoured", "Armoured", "Armoured"),
+]
+
+MTO_ACTIONS = [
+    "Engineering feasibility check",
+    "Design/BOM finalization",
+    "Prototype/test sample if required",
+    "Finalize new SKU code and lead time",
+    "Commercial approval for deviations"
+]
+
+MTO_PREMIUM_PCT = 12  # customization premium over the closest standard SKU
 
-def build_gap_table(rfp_specs: dict, closest_sku_row: dict) -> pd.DataFrame:
-    rows = []
-    mapping = {
-        "voltage_kV": "Voltage_kV",
-        "conductor": "Conductor",
-        "insulation": "Insulation",
-        "cores": "Cores",
-        "armoured": "Armoured",
-    }
 
-    for rfp_key, sku_col in mapping.items():
+def is_voltage_mismatch(rfp_specs: dict, closest_sku_row: dict) -> bool:
+    """
+    Voltage class is mandatory: a different voltage forces MTO even
+    when the rest of the spec matches
+    """
+    rfp_v = rfp_specs.get("voltage_kV")
+    best_v = closest_sku_row.get("Voltage_kV")
+
+    try:
+        if rfp_v is not None and best_v is not None:
+            return float(rfp_v) != float(best_v)
+    except Exception:
+        pass
+
+    return False
+
+
+def build_gap_rows(rfp_specs: dict, closest_sku_row: dict, catalog: SkuCatalog = None) -> list:
+    """
+    Gap table as plain dicts (JSON-ready, no DataFrame)
+
+    Values are compared the way match_catalog compares them: the RFP
+    side is normalized once per request, and when the closest SKU came
+    from an index over catalog (it carries "catalog_row") its values are
+    read from the catalog's pre-normalized field arrays
+    """
+    rfp_values = dict(zip((rfp_key for _, rfp_key in MATCH_FIELDS), spec_signature(rfp_specs)))
+    row = closest_sku_row.get("catalog_row") if catalog is not None else None
+
+    rows = []
+    for rfp_key, sku_col, label in GAP_FIELDS:
+        if row is not None:
+            sku_value = catalog.fields[rfp_key][row]
+        else:
+            sku_value = str(closest_sku_row.get(sku_col)).lower()
         rows.append({
-            "Parameter": rfp_key.replace("_", " ").title(),
+            "Parameter": label,
             "RFP Requirement": rfp_specs.get(rfp_key),
             "Closest SKU Value": closest_sku_row.get(sku_col),
-            "Match": "Yes" if str(rfp_specs.get(rfp_key)).strip().lower() == str(closest_sku_row.get(sku_col)).strip().lower() else "No"
+            "Match": "Yes" if rfp_values[rfp_key] == sku_value else "No"
         })
+    return rows
+
+
+def build_gap_table(rfp_specs: dict, closest_sku_row: dict) -> pd.DataFrame:
+    import pandas as pd
 
-    return pd.DataFrame(rows)
+    return pd.DataFrame(build_gap_rows(rfp_specs, closest_sku_row))
 
-def generate_mto_request(rfp_meta: dict, rfp_specs: dict, closest_sku_row: dict) -> dict:
-    gap_df = build_gap_table(rfp_specs, closest_sku_row)
 
+def generate_mto_request(rfp_meta: dict, rfp_specs: dict, closest_sku_row: dict, catalog: SkuCatalog = None) -> dict:
     request = {
         "rfp_id": rfp_meta.get("rfp_id"),
         "due_date": str(rfp_meta.get("due_date")),
@@ -34,14 +92,91 @@ def generate_mto_request(rfp_meta: dict, rfp_specs: dict, closest_sku_row: dict)
             "Product_Category": closest_sku_row.get("Product_Category"),
             "Unit_Price_per_km_INR": closest_sku_row.get("Unit_Price_per_km_INR"),
         },
-        "actions": [
-            "Engineering feasibility check",
-            "Design/BOM finalization",
-            "Prototype/test sample if required",
-            "Finalize new SKU code and lead time",
-            "Commercial approval for deviations"
-        ],
-        "gap_table": gap_df.to_dict(orient="records")
+        "actions": list(MTO_ACTIONS),
+        "gap_table": build_gap_rows(rfp_specs, closest_sku_row, catalog)
     }
 
     return request
+
+
+def estimate_mto_pricing(closest_sku_row: dict, quantity_km: float) -> dict:
+    """
+    Rough material estimate for the MTO line of the consolidated pricing
+    (closest SKU price + MTO_PREMIUM_PCT); test and total cost stay open
+    until engineering confirms the design
+    """
+    base_unit_price = closest_sku_row.get("Unit_Price_per_km_INR", 0) or 0
+
+    return {
+        "sku_id": "MTO_REQUIRED",
+        "classification": "MTO_TRIGGERED",
+        "material_cost": int(base_unit_price * quantity_km * (1 + MTO_PREMIUM_PCT / 100)),
+        "test_cost": None,
+        "total_cost": None
+    }
+
+
+# -------------------------------------------------
+# Batch MTO generation (engineering queue)
+# -------------------------------------------------
+def json_default(value):
+    # NumPy scalars from SKU rows, datetimes in rfp_meta
+    if hasattr(value, "item"):
+        return value.item()
+    return str(value)
+
+
+class MtoRequestWriter:
+    """
+    Appends MTO payloads to a JSONL file (one request per line) as the
+    decisions come in, so a pipeline can hand each request to the
+    engineering queue without buffering the batch
+
+    The file is only created by the first write; use as a context
+    manager (or call close()). written counts the requests.
+    """
+
+    def __init__(self, out_path: str, catalog: SkuCatalog = None):
+        self.out_path = out_path
+        self.catalog = catalog
+        self.written = 0
+        self._file = None
+
+    def write(self, rfp_meta: dict, rfp_specs: dict, closest_sku_row: dict) -> dict:
+        if self._file is None:
+            self._file = open(self.out_path, "w", encoding="utf-8")
+
+        payload = generate_mto_request(rfp_meta, rfp_specs, closest_sku_row, self.catalog)
+        self._file.write(json.dumps(payload, default=json_default, ensure_ascii=False) + "\n")
+        self._file.flush()
+        self.written += 1
+        return payload
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def generate_mto_requests(triples, out_path: str, catalog: SkuCatalog = None) -> int:
+    """
+    Streams MTO payloads for many (rfp_meta, rfp_specs, closest_sku_row)
+    triples to a JSONL file, one request per line
+
+    Triples are consumed one at a time, so any iterable (e.g. a
+    generator over a large batch) is written without holding the
+    payloads in memory. Returns the number of requests written.
+    """
+    with MtoRequestWriter(out_path, catalog) as writer:
+        for rfp_meta, rfp_specs, closest_sku_row in triples:
+            writer.write(rfp_meta, rfp_specs, closest_sku_row)
+
+    print(f"[MTO Agent] Wrote {writer.written} MTO request(s) to {out_path}")
+
+    return writer.written
@@ -0,0 +1,267 @@
+import heapq
+import itertools
+import threading
+from datetime import datetime
+
+from utils.pdf_reader import iter_page_text
+from utils.section_finder import find_section
+from utils.normalizer import (
+    extract_voltage,
+    extract_conductor,
+    extract_insulation,
+    extract_cores,
+    extract_armouring
+)
+from src.technical_agent import match_catalog
+from src.pricing_agent import price_matches
+from src.mto_agent import is_voltage_mismatch
+from utils.doc_profiler import NO_PROFILE
+
+# -------------------------------------------------
+# CONFIG: scheduling weights
+# -------------------------------------------------
+URGENCY_WEIGHT = 0.6
+VALUE_WEIGHT = 0.3
+COST_WEIGHT = 0.1
+
+DEFAULT_VALUE_INR = 1_000_000
+PAGES_PER_STEP = 5
+PREEMPT_MIN_PAGES = 20
+
+
+# -------------------------------------------------
+# Priority score
+# -------------------------------------------------
+def priority_score(rfp: dict, max_value: float, max_pages: int, today: datetime = None) -> float:
+    """
+    Higher score = process sooner
+
+    Combines deadline urgency, estimated value and processing cost
+    (page count), each scaled to 0..1 within the batch; overdue RFPs
+    keep climbing past 1 (towards 2) so the most overdue runs first
+    """
+    today = today or datetime.today()
+
+    if rfp.get("due_date"):
+        days_left = (rfp["due_date"] - today).days
+        if days_left >= 0:
+            urgency = 1 / (1 + days_left)
+        else:
+            urgency = 2 - 1 / (1 - days_left)
+    else:
+        urgency = 0.0
+
+    value = rfp.get("estimated_value") or DEFAULT_VALUE_INR
+    pages = rfp.get("page_count") or 1
+
+    return (
+        URGENCY_WEIGHT * urgency
+        + VALUE_WEIGHT * value / max_value
+        - COST_WEIGHT * pages / max_pages
+    )
+
+
+# -------------------------------------------------
+# Spec extraction from RFP text
+# -------------------------------------------------
+def extract_rfp_specs(rfp_text: str) -> dict:
+    tech_section = find_section(
+        rfp_text,
+        ["technical requirements", "scope of supply"],
+        ["integration approach", "security"]
+    )
+
+    return {
+        "voltage_kV": extract_voltage(tech_section),
+        "conductor": extract_conductor(tech_section),
+        "insulation": extract_insulation(tech_section),
+        "cores": extract_cores(tech_section),
+        "armoured": extract_armouring(tech_section)
+    }
+
+
+# -------------------------------------------------
+# Resumable technical + pricing job
+# -------------------------------------------------
+def technical_pricing_job(rfp: dict, catalog, quantity_km: float, test_cost: float, profiler=None, match_cache=None):
+    """
+    Generator version of the technical + pricing flow for one RFP,
+    matching against a prepared SkuCatalog (see build_catalog)
+
+    Yields after every PAGES_PER_STEP pages so the scheduler can pause
+    (preempt) long documents; the result dict is the generator's return value.
+    With a DocumentProfiler, each stage is timed and slow documents get
+    a profile saved (see utils.doc_profiler); with a MatchCache, repeated
+    spec combinations reuse their ranking.
+    """
+    run = profiler.document(rfp) if profiler else NO_PROFILE
+    run.resume()
+
+    def step():
+        run.pause()
+        yield
+        run.resume()
+
+    try:
+        pages = []
+        page_iter = iter_page_text(rfp["path"])
+        while True:
+            with run.stage("extract_text"):
+                page_text = next(page_iter, None)
+            if page_text is None:
+                break
+            pages.append(page_text)
+            if len(pages) % PAGES_PER_STEP == 0:
+                yield from step()
+
+        with run.stage("extract_specs"):
+            rfp_specs = extract_rfp_specs("\n".join(p for p in pages if p))
+        yield from step()
+
+        with run.stage("match"):
+            if match_cache is not None:
+                matches = match_cache.match(catalog, rfp_specs)
+            else:
+                matches = match_catalog(catalog, rfp_specs)
+        with run.stage("pricing"):
+            pricing = price_matches(matches, quantity_km, test_cost)
+    finally:
+        run.finish()
+
+    return {
+        "rfp_specs": rfp_specs,
+        "matches": matches,
+        "pricing": pricing
+    }
+
+
+def rfp_decision(matches, rfp_specs: dict) -> dict:
+    """
+    Decision summary row for a MatchResult, with the same MTO rule as
+    the app and the matching service: MTO when even the best SKU is
+    NO_MATCH or its voltage class differs from the RFP's (mandatory)
+    """
+    best = matches.record(0)
+    best_voltage = matches.catalog.fields["voltage_kV"][best.row]
+    mto_triggered = (
+        best.match_classification == "NO_MATCH"
+        or is_voltage_mismatch(rfp_specs, {"Voltage_kV": best_voltage})
+    )
+
+    return {
+        "best_sku": "MTO_REQUIRED" if mto_triggered else best.sku_id,
+        "spec_match_pct": best.spec_match_pct,
+        "classification": "MTO_TRIGGERED" if mto_triggered else best.match_classification,
+        "mto_triggered": mto_triggered
+    }
+
+
+# -------------------------------------------------
+# Priority scheduler
+# -------------------------------------------------
+class RfpScheduler:
+    """
+    Runs RFP jobs on a pool of worker threads in priority order
+
+    job_fn(rfp) must return a generator (see technical_pricing_job).
+    Between steps, a job on a long document (>= preempt_min_pages) is
+    put back in the queue if a higher-priority RFP is waiting, so tenders
+    closest to their deadline get results first.
+    """
+
+    def __init__(self, job_fn, workers: int = 2, preempt_min_pages: int = PREEMPT_MIN_PAGES):
+        self.job_fn = job_fn
+        self.workers = workers
+        self.preempt_min_pages = preempt_min_pages
+        self.preemptions = 0
+
+        self._heap = []
+        self._counter = itertools.count()
+        self._cond = threading.Condition()
+        self._active = 0
+
+    def _push(self, score: float, rfp: dict, job):
+        heapq.heappush(self._heap, (-score, next(self._counter), rfp, job))
+
+    def _worker(self, on_result):
+        while True:
+            with self._cond:
+                while not self._heap and self._active:
+                    self._cond.wait()
+                if not self._heap:
+                    return
+                neg_score, _, rfp, job = heapq.heappop(self._heap)
+                self._active += 1
+
+            # Whatever job_fn, the job or on_result raise, the slot is
+            # released so the other workers (and run()) can finish
+            try:
+                result, error, preempted = None, None, False
+
+                try:
+                    if job is None:
+                        job = self.job_fn(rfp)
+
+                    long_doc = (rfp.get("page_count") or 0) >= self.preempt_min_pages
+                    while True:
+                        next(job)
+                        if long_doc:
+                            with self._cond:
+                                if self._heap and self._heap[0][0] < neg_score:
+                                    self._push(-neg_score, rfp, job)
+                                    self.preemptions += 1
+                                    self._cond.notify()
+                                    preempted = True
+                                    break
+                except StopIteration as stop:
+                    result = stop.value
+                except Exception as e:
+                    error = e
+                    print(f"[Orchestrator] Failed to process {rfp.get('rfp_id')}: {e}")
+
+                if not preempted:
+                    on_result(rfp, result, error)
+            finally:
+                with self._cond:
+                    self._active -= 1
+                    self._cond.notify_all()
+
+    def run(self, rfps: list, on_result=None) -> list:
+        """
+        Processes all RFPs and returns (rfp, result, error) tuples in
+        completion order; on_result is also called as each one finishes,
+        and an exception it raises is reported as that RFP's error
+        """
+        completed = []
+        lock = threading.Lock()
+
+        def collect(rfp, result, error):
+            with lock:
+                if on_result:
+                    try:
+                        on_result(rfp, result, error)
+                    except Exception as e:
+                        # A failing callback marks this RFP as failed
+                        # rather than taking the worker down
+                        print(f"[Orchestrator] Result handler failed for {rfp.get('rfp_id')}: {e}")
+                        error = error or e
+                completed.append((rfp, result, error))
+
+        max_value = max((r.get("estimated_value") or DEFAULT_VALUE_INR for r in rfps), default=1)
+        max_pages = max((r.get("page_count") or 1 for r in rfps), default=1)
+        today = datetime.today()
+
+        with self._cond:
+            for rfp in rfps:
+                self._push(priority_score(rfp, max_value, max_pages, today), rfp, None)
+
+        threads = [
+            threading.Thread(target=self._worker, args=(collect,), daemon=True)
+            for _ in range(max(1, self.workers))
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        return completed
@@ -1,9 +1,20 @@
-import pandas as pd
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from src.technical_agent import MATCH_CLASSES, NO_MATCH_CODE
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
 
 # -------------------------------------------------
 # Load test pricing table
 # -------------------------------------------------
 def load_test_prices(path: str) -> pd.DataFrame:
+    import pandas as pd
+
     df = pd.read_excel(path)
 
     # Normalize column names
@@ -71,3 +82,84 @@ def compute_pricing(
         "test_cost",
         "total_cost"
     ]]
+
+
+# -------------------------------------------------
+# Compact hot-path pricing
+# -------------------------------------------------
+PRICED_CLASSES = ("STRONG_MATCH", "PARTIAL_MATCH")
+PRICING_DTYPE = [
+    ("row", "i4"),
+    ("match_class", "i1"),
+    ("material_cost", "f8"),
+    ("test_cost", "f8"),
+    ("total_cost", "f8")
+]
+ITER_CHUNK_ROWS = 4096
+
+
+@dataclass(slots=True)
+class PricingRecord:
+    sku_id: str
+    match_classification: str
+    material_cost: float
+    test_cost: float
+    total_cost: float
+
+
+def total_test_cost(test_price_path: str) -> float:
+    test_df = load_test_prices(test_price_path)
+    return test_df[resolve_price_column(test_df)].sum().item()
+
+
+def price_matches(result, quantity_km: float, test_cost: float) -> np.ndarray:
+    """
+    Same pricing as compute_pricing for a technical_agent.MatchResult,
+    as a PRICING_DTYPE structured array in ranked order.
+
+    test_cost comes from total_test_cost so the Excel table is read
+    once per batch, not once per RFP.
+    """
+    import numpy as np
+
+    eligible = result.ranked[result.ranked["match_class"] != NO_MATCH_CODE]
+
+    priced = np.empty(len(eligible), dtype=PRICING_DTYPE)
+    priced["row"] = eligible["row"]
+    priced["match_class"] = eligible["match_class"]
+    priced["material_cost"] = result.catalog.prices[eligible["row"]] * quantity_km
+    priced["test_cost"] = test_cost
+    priced["total_cost"] = priced["material_cost"] + test_cost
+
+    return priced
+
+
+def iter_pricing(priced: np.ndarray, catalog):
+    """
+    Yields PricingRecord rows for display/export; converts chunk by
+    chunk so streaming exports of large catalogs stay flat in memory
+    """
+    for start in range(0, len(priced), ITER_CHUNK_ROWS):
+        for row, code, material_cost, test_cost, total_cost in priced[start:start + ITER_CHUNK_ROWS].tolist():
+            yield PricingRecord(
+                catalog.sku_ids[row],
+                MATCH_CLASSES[code],
+                material_cost,
+                test_cost,
+                total_cost
+            )
+
+
+def pricing_to_frame(priced: np.ndarray, catalog) -> pd.DataFrame:
+    """
+    Display-edge conversion to the compute_pricing column layout
+    """
+    import pandas as pd
+
+    return pd.DataFrame({
+        "SKU_ID": catalog.sku_ids[priced["row"]],
+        "match_classification": [MATCH_CLASSES[c] for c in priced["match_class"].tolist()],
+        "material_cost": priced["material_cost"],
+        "test_cost": priced["test_cost"],
+        "total_cost": priced["total_cost"]
+    })
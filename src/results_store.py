@@ -0,0 +1,374 @@
+import json
+import sqlite3
+from datetime import datetime
+
+from src.mto_agent import json_default
+from src.pricing_agent import iter_pricing
+
+# Ranked matches kept per document: the top MATCHES_STORED_PER_RFP plus
+# every priced (STRONG / PARTIAL) match below them, so the stored ranking
+# always covers the pricing (see catalog_agent.rematch_rfps)
+MATCHES_STORED_PER_RFP = 100
+
+# Bump when the table layout changes: the store is derived data, so an
+# older file is simply rebuilt
+SCHEMA_VERSION = 4
+TABLES = ("rfps", "rfp_specs", "matches", "decisions", "pricing", "mto_requests")
+
+# Every table is keyed on (rfp_id, doc_path): placeholder ids such as
+# UNKNOWN_PDF, or one RFP number on two documents, stay separate rows
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS rfps (
+    rfp_id      TEXT NOT NULL,
+    path        TEXT NOT NULL DEFAULT '',
+    source      TEXT,
+    issuer      TEXT,
+    due_date    TEXT,
+    page_count  INTEGER,
+    sources     TEXT,
+    scanned_at  TEXT,
+    PRIMARY KEY (rfp_id, path)
+);
+CREATE INDEX IF NOT EXISTS idx_rfps_due_date ON rfps (due_date);
+
+CREATE TABLE IF NOT EXISTS rfp_specs (
+    rfp_id      TEXT NOT NULL,
+    doc_path    TEXT NOT NULL DEFAULT '',
+    specs       TEXT NOT NULL,
+    doc_mtime   REAL,
+    PRIMARY KEY (rfp_id, doc_path)
+);
+
+CREATE TABLE IF NOT EXISTS matches (
+    rfp_id          TEXT NOT NULL,
+    doc_path        TEXT NOT NULL DEFAULT '',
+    rank            INTEGER NOT NULL,
+    sku_id          TEXT NOT NULL,
+    spec_match_pct  REAL,
+    classification  TEXT,
+    unit_price      REAL,
+    PRIMARY KEY (rfp_id, doc_path, rank)
+);
+CREATE INDEX IF NOT EXISTS idx_matches_classification ON matches (classification);
+
+CREATE TABLE IF NOT EXISTS decisions (
+    rfp_id          TEXT NOT NULL,
+    doc_path        TEXT NOT NULL DEFAULT '',
+    best_sku        TEXT,
+    spec_match_pct  REAL,
+    classification  TEXT,
+    mto_triggered   INTEGER,
+    decided_at      TEXT,
+    doc_mtime       REAL,
+    catalog_version TEXT,
+    PRIMARY KEY (rfp_id, doc_path)
+);
+CREATE INDEX IF NOT EXISTS idx_decisions_classification ON decisions (classification);
+
+CREATE TABLE IF NOT EXISTS pricing (
+    rfp_id          TEXT NOT NULL,
+    doc_path        TEXT NOT NULL DEFAULT '',
+    sku_id          TEXT NOT NULL,
+    classification  TEXT,
+    material_cost   REAL,
+    test_cost       REAL,
+    total_cost      REAL,
+    PRIMARY KEY (rfp_id, doc_path, sku_id)
+);
+
+CREATE TABLE IF NOT EXISTS mto_requests (
+    rfp_id      TEXT NOT NULL,
+    doc_path    TEXT NOT NULL DEFAULT '',
+    payload     TEXT NOT NULL,
+    created_at  TEXT,
+    PRIMARY KEY (rfp_id, doc_path)
+);
+"""
+
+
+def stored_match_count(matches) -> int:
+    """
+    How many rows of a MatchResult the store keeps (see MATCHES_STORED_PER_RFP)
+    """
+    return max(MATCHES_STORED_PER_RFP, matches.eligible_count())
+
+
+def _iso(value) -> str:
+    return value.isoformat() if hasattr(value, "isoformat") else value
+
+
+class ResultsStore:
+    """
+    Local SQLite store for scanned RFPs, extracted specs, ranked matches,
+    pricing and MTO payloads
+
+    Every write method runs as a single transaction with executemany, so
+    bulk upserts of a whole batch cost one commit. Rows are keyed on
+    (rfp_id, document path); re-saving a document replaces its previous
+    matches / pricing / MTO rows.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+
+        if self.conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            with self.conn:
+                for table in TABLES:
+                    self.conn.execute(f"DROP TABLE IF EXISTS {table}")
+                self.conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    # ---------------- Writes ----------------
+    def upsert_rfps(self, rfps: list):
+        now = datetime.now().isoformat()
+        rows = [
+            (
+                r["rfp_id"],
+                r.get("path") or "",
+                r.get("source"),
+                r.get("issuer"),
+                _iso(r.get("due_date")),
+                r.get("page_count"),
+                json.dumps(r.get("sources") or [r.get("source")]),
+                now
+            )
+            for r in rfps
+        ]
+
+        with self.conn:
+            self.conn.executemany(
+                """
+                INSERT INTO rfps (rfp_id, path, source, issuer, due_date, page_count, sources, scanned_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (rfp_id, path) DO UPDATE SET
+                    source = excluded.source,
+                    issuer = excluded.issuer,
+                    due_date = excluded.due_date,
+                    page_count = excluded.page_count,
+                    sources = excluded.sources,
+                    scanned_at = excluded.scanned_at
+                """,
+                rows
+            )
+
+    def save_results(self, results: list):
+        """
+        Bulk upsert of processed RFPs; each item is a dict with
+        - rfp_id, rfp_specs
+        - matches (technical_agent.MatchResult) and pricing
+          (pricing_agent.price_matches output), optional
+        - catalog: the SkuCatalog the pricing rows refer to; only needed
+          for pricing without matches (otherwise matches.catalog)
+        - match_rows: already-ranked match dicts (sku_id, spec_match_pct,
+          classification, unit_price), e.g. from a remote worker, optional;
+          stored as given, so send the top stored_match_count(matches)
+        - decision: {"best_sku", "spec_match_pct", "classification", "mto_triggered"}
+        - extra_pricing: list of pricing dicts (e.g. the MTO estimate line), optional
+        - mto_request: MTO payload dict or None
+        - doc_path / doc_mtime of the document the specs came from, optional
+        - catalog_version of the SkuCatalog it was matched against, optional
+          (with doc_mtime, lets decision() tell whether it is still current)
+        """
+        now = datetime.now().isoformat()
+
+        # One entry per document; a repeated document in the batch keeps
+        # its last result instead of tripping the primary keys
+        results = list({(r["rfp_id"], r.get("doc_path") or ""): r for r in results}.values())
+        doc_keys = [(r["rfp_id"], r.get("doc_path") or "") for r in results]
+        spec_rows, match_rows, decision_rows, pricing_rows, mto_rows = [], [], [], [], []
+
+        for r, (rfp_id, doc_path) in zip(results, doc_keys):
+            spec_rows.append((rfp_id, doc_path, json.dumps(r["rfp_specs"], default=json_default), r.get("doc_mtime")))
+
+            matches = r.get("matches")
+            if matches is not None:
+                for rank, m in enumerate(matches.top(stored_match_count(matches))):
+                    match_rows.append((rfp_id, doc_path, rank, m.sku_id, m.spec_match_pct, m.match_classification, m.unit_price))
+            for rank, m in enumerate(r.get("match_rows") or []):
+                match_rows.append((rfp_id, doc_path, rank, m["sku_id"], m["spec_match_pct"], m["classification"], m["unit_price"]))
+
+            # Keyed by SKU so a line listed twice is stored once
+            priced = {}
+            if r.get("pricing") is not None:
+                catalog = r.get("catalog") or (matches.catalog if matches is not None else None)
+                if catalog is None:
+                    raise ValueError(f"Pricing for {rfp_id} ({doc_path}) needs matches or a catalog to resolve SKU ids")
+                for p in iter_pricing(r["pricing"], catalog):
+                    priced[p.sku_id] = (p.match_classification, p.material_cost, p.test_cost, p.total_cost)
+            for p in r.get("extra_pricing") or []:
+                priced[p["sku_id"]] = (p.get("classification"), p.get("material_cost"), p.get("test_cost"), p.get("total_cost"))
+            pricing_rows.extend((rfp_id, doc_path, sku_id, *values) for sku_id, values in priced.items())
+
+            d = r["decision"]
+            decision_rows.append((
+                rfp_id, doc_path, d["best_sku"], d["spec_match_pct"], d["classification"], int(d["mto_triggered"]), now,
+                r.get("doc_mtime"), r.get("catalog_version")
+            ))
+
+            if r.get("mto_request"):
+                mto_rows.append((rfp_id, doc_path, json.dumps(r["mto_request"], default=json_default), now))
+
+        with self.conn:
+            for table in ("matches", "pricing", "mto_requests"):
+                self.conn.executemany(f"DELETE FROM {table} WHERE rfp_id = ? AND doc_path = ?", doc_keys)
+
+            self.conn.executemany(
+                """
+                INSERT INTO rfp_specs (rfp_id, doc_path, specs, doc_mtime) VALUES (?, ?, ?, ?)
+                ON CONFLICT (rfp_id, doc_path) DO UPDATE SET
+                    specs = excluded.specs, doc_mtime = excluded.doc_mtime
+                """,
+                spec_rows
+            )
+            self.conn.executemany("INSERT INTO matches VALUES (?, ?, ?, ?, ?, ?, ?)", match_rows)
+            self.conn.executemany("INSERT INTO pricing VALUES (?, ?, ?, ?, ?, ?, ?)", pricing_rows)
+            self.conn.executemany(
+                """
+                INSERT INTO decisions VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (rfp_id, doc_path) DO UPDATE SET
+                    best_sku = excluded.best_sku,
+                    spec_match_pct = excluded.spec_match_pct,
+                    classification = excluded.classification,
+                    mto_triggered = excluded.mto_triggered,
+                    decided_at = excluded.decided_at,
+                    doc_mtime = excluded.doc_mtime,
+                    catalog_version = excluded.catalog_version
+                """,
+                decision_rows
+            )
+            self.conn.executemany("INSERT INTO mto_requests VALUES (?, ?, ?, ?)", mto_rows)
+
+    def set_catalog_version(self, doc_keys: list, catalog_version: str):
+        """
+        Marks stored decisions for (rfp_id, doc_path) keys as current for
+        catalog_version, e.g. after a re-match found them unaffected
+        """
+        with self.conn:
+            self.conn.executemany(
+                "UPDATE decisions SET catalog_version = ? WHERE rfp_id = ? AND doc_path = ?",
+                [(catalog_version, rfp_id, doc_path) for rfp_id, doc_path in doc_keys]
+            )
+
+    # ---------------- Reads ----------------
+    def iter_specs(self):
+        """
+        One dict per stored document: rfp_id, doc_path, rfp_specs and
+        doc_mtime, plus the scanned RFP's due_date / issuer
+        """
+        sql = """
+            SELECT s.rfp_id, s.doc_path, s.specs, s.doc_mtime, r.due_date, r.issuer
+            FROM rfp_specs s LEFT JOIN rfps r ON r.rfp_id = s.rfp_id AND r.path = s.doc_path
+            ORDER BY s.rfp_id, s.doc_path
+        """
+        for r in self.conn.execute(sql).fetchall():
+            row = dict(r)
+            row["rfp_specs"] = json.loads(row.pop("specs"))
+            yield row
+
+    def cached_specs(self, rfp_id: str, doc_path: str, doc_mtime: float):
+        """
+        Stored rfp_specs if they were extracted from this exact document
+        (same path and modification time), else None
+        """
+        row = self.conn.execute(
+            "SELECT specs FROM rfp_specs WHERE rfp_id = ? AND doc_path = ? AND doc_mtime = ?",
+            (rfp_id, doc_path, doc_mtime)
+        ).fetchone()
+        return json.loads(row["specs"]) if row else None
+
+    def decision(self, rfp_id: str, doc_path: str, doc_mtime: float = None, catalog_version: str = None):
+        """
+        Stored decision for one document, or None; with doc_mtime /
+        catalog_version, only if it was made for that exact document
+        revision and SKU master
+        """
+        sql = "SELECT * FROM decisions WHERE rfp_id = ? AND doc_path = ?"
+        params = [rfp_id, doc_path]
+        if doc_mtime is not None:
+            sql += " AND doc_mtime = ?"
+            params.append(doc_mtime)
+        if catalog_version is not None:
+            sql += " AND catalog_version = ?"
+            params.append(catalog_version)
+        row = self.conn.execute(sql, params).fetchone()
+        return dict(row) if row else None
+
+    def top_matches(self, rfp_id: str, limit: int = 10, doc_path: str = None) -> list:
+        """
+        Stored ranked matches, best first; limit=None returns all of them
+        """
+        sql = "SELECT * FROM matches WHERE rfp_id = ?"
+        params = [rfp_id]
+        if doc_path is not None:
+            sql += " AND doc_path = ?"
+            params.append(doc_path)
+        # LIMIT -1 is SQLite for "no limit"
+        limit = -1 if limit is None else limit
+        return [dict(r) for r in self.conn.execute(sql + " ORDER BY doc_path, rank LIMIT ?", params + [limit])]
+
+    def mto_request(self, rfp_id: str, doc_path: str = None):
+        sql = "SELECT payload FROM mto_requests WHERE rfp_id = ?"
+        params = [rfp_id]
+        if doc_path is not None:
+            sql += " AND doc_path = ?"
+            params.append(doc_path)
+        row = self.conn.execute(sql, params).fetchone()
+        return json.loads(row["payload"]) if row else None
+
+    def iter_decision_summary(self, rfp_ids: list = None, classification: str = None, doc_keys: list = None):
+        """
+        One row (dict) per processed RFP, soonest due date first, read
+        lazily from the cursor; doc_keys ((rfp_id, doc_path) pairs)
+        limits it to those documents
+        """
+        sql = """
+            SELECT d.rfp_id, r.due_date, d.best_sku, d.spec_match_pct, d.classification, d.mto_triggered, d.doc_path
+            FROM decisions d LEFT JOIN rfps r ON r.rfp_id = d.rfp_id AND r.path = d.doc_path
+        """
+        sql, params = self._filter(sql, "d", rfp_ids, classification, doc_keys)
+        for r in self.conn.execute(sql + " ORDER BY r.due_date, d.rfp_id, d.doc_path", params):
+            yield dict(r)
+
+    def iter_pricing_summary(self, rfp_ids: list = None, classification: str = None, doc_keys: list = None):
+        sql = """
+            SELECT p.rfp_id, p.sku_id, p.classification, p.material_cost, p.test_cost, p.total_cost, p.doc_path
+            FROM pricing p LEFT JOIN rfps r ON r.rfp_id = p.rfp_id AND r.path = p.doc_path
+        """
+        sql, params = self._filter(sql, "p", rfp_ids, classification, doc_keys)
+        for r in self.conn.execute(sql + " ORDER BY r.due_date, p.rfp_id, p.doc_path, p.total_cost", params):
+            yield dict(r)
+
+    def decision_summary(self, rfp_ids: list = None, classification: str = None, doc_keys: list = None) -> list:
+        return list(self.iter_decision_summary(rfp_ids, classification, doc_keys))
+
+    def pricing_summary(self, rfp_ids: list = None, classification: str = None, doc_keys: list = None) -> list:
+        return list(self.iter_pricing_summary(rfp_ids, classification, doc_keys))
+
+    @staticmethod
+    def _filter(sql: str, alias: str, rfp_ids: list, classification: str, doc_keys: list = None) -> tuple:
+        clauses, params = [], []
+        if rfp_ids is not None:
+            clauses.append(f"{alias}.rfp_id IN ({', '.join('?' * len(rfp_ids))})")
+            params.extend(rfp_ids)
+        if doc_keys is not None:
+            # Only the listed (rfp_id, doc_path) documents, not every
+            # document sharing one of their RFP IDs
+            if doc_keys:
+                values = ", ".join(["(?, ?)"] * len(doc_keys))
+                clauses.append(f"({alias}.rfp_id, {alias}.doc_path) IN (VALUES {values})")
+                for rfp_id, doc_path in doc_keys:
+                    params.extend((rfp_id, doc_path or ""))
+            else:
+                clauses.append("0")
+        if classification is not None:
+            clauses.append(f"{alias}.classification = ?")
+            params.append(classification)
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        return sql, params
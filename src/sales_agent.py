@@ -1,9 +1,8 @@
 import os
 import json
 import re
+from difflib import SequenceMatcher
 from datetime import datetime, timedelta
-from bs4 import BeautifulSoup
-from PyPDF2 import PdfReader
 
 
 # -------------------------------------------------
@@ -18,56 +17,254 @@ def parse_date(date_str: str) -> datetime:
     return None
 
 
+# -------------------------------------------------
+# Estimated tender value
+# -------------------------------------------------
+# Only explicitly labelled values count; eligibility thresholds such as
+# "projects worth at least INR 1 crore" are not the tender's value
+VALUE_PATTERN = re.compile(
+    r"(?:estimated\s+(?:cost|value)|tender\s+value|contract\s+value)[^:\n\d]{0,40}[:\-]?\s*"
+    r"(?:INR|Rs\.?|₹)?\s*([\d,]+(?:\.\d+)?)\s*(lakhs?|lacs?|crores?|cr\b)?",
+    re.IGNORECASE
+)
+VALUE_MULTIPLIERS = {"lakh": 1e5, "lac": 1e5, "crore": 1e7, "cr": 1e7}
+
+
+def parse_estimated_value(text: str) -> float:
+    """
+    Estimated tender value in INR from a labelled line ("Estimated Cost:
+    INR 2.5 Crore", "Tender Value: Rs. 45,00,000"), or None
+    """
+    match = VALUE_PATTERN.search(text or "")
+    if not match:
+        return None
+
+    try:
+        value = float(match.group(1).replace(",", ""))
+    except ValueError:
+        return None
+
+    unit = (match.group(2) or "").lower().rstrip("s")
+    return value * VALUE_MULTIPLIERS.get(unit, 1)
+
+
 # -------------------------------------------------
 # Parsers
 # -------------------------------------------------
 def parse_pdf(path: str) -> dict:
+    from PyPDF2 import PdfReader
+
     reader = PdfReader(path)
     text = "\n".join(p.extract_text() for p in reader.pages if p.extract_text())
 
     rfp_id = re.search(r"RFP\s*NO\.?\s*[:\-]?\s*(.+)", text)
     due_date = re.search(r"Last date.*submission.*(\d{2}[/-]\d{2}[/-]\d{4})", text)
+    issuer = re.search(r"Issued\s+By\s*\n?\s*(.+)", text)
 
     return {
         "rfp_id": rfp_id.group(1).strip() if rfp_id else "UNKNOWN_PDF",
         "due_date": parse_date(due_date.group(1)) if due_date else None,
+        "issuer": issuer.group(1).strip() if issuer else None,
+        "estimated_value": parse_estimated_value(text),
         "source": "PDF",
-        "path": path
+        "path": path,
+        "page_count": len(reader.pages)
     }
 
 
-def parse_html(path: str) -> dict:
-    with open(path, "r", encoding="utf-8") as f:
-        soup = BeautifulSoup(f.read(), "html.parser")
+# Elements whose class marks one tender on a portal listing page
+TENDER_BLOCK_TAGS = ("div", "section", "article", "li", "tr")
+TENDER_BLOCK_CLASSES = {"rfp", "tender"}
+# Elements that start a new line when rendered; inline markup (strong,
+# span, a, ...) doesn't, so a field value split by it stays on one line
+LINE_BREAK_TAGS = {
+    "p", "div", "br", "li", "tr", "td", "th", "dt", "dd", "section", "article",
+    "h1", "h2", "h3", "h4", "h5", "h6"
+}
+
 
-    text = soup.get_text(" ")
+def _block_text(block) -> str:
+    """
+    Text of a tender block with one field per line, so "Label: (.+)"
+    patterns stop at the next field even on minified pages
+    """
+    from lxml import etree
 
+    parts = []
+    for event, el in etree.iterwalk(block, events=("start", "end", "comment", "pi")):
+        # Comments / processing instructions: their text is not page
+        # content, but the text after them (tail) is
+        if event in ("comment", "pi"):
+            parts.append(el.tail or "")
+            continue
+        if el.tag.lower() in LINE_BREAK_TAGS:
+            parts.append("\n")
+        if event == "start":
+            parts.append(el.text or "")
+        elif el is not block:
+            parts.append(el.tail or "")
+    return "".join(parts)
+
+
+def _tender_from_text(text: str, path: str, block: int) -> dict:
     rfp_id = re.search(r"RFP ID:\s*(\S+)", text)
     due_date = re.search(r"Due Date:\s*(\d{2}-\d{2}-\d{4})", text)
+    issuer = re.search(r"Issuing Authority:\s*(.+)", text)
 
     return {
         "rfp_id": rfp_id.group(1) if rfp_id else "UNKNOWN_HTML",
         "due_date": parse_date(due_date.group(1)) if due_date else None,
+        "issuer": issuer.group(1).strip() if issuer else None,
+        "estimated_value": parse_estimated_value(text),
         "source": "HTML",
-        "path": path
+        "path": path,
+        "block": block
     }
 
 
-def parse_email(path: str) -> dict:
+def parse_html(path: str) -> dict:
+    from bs4 import BeautifulSoup
+
     with open(path, "r", encoding="utf-8") as f:
-        text = f.read()
+        soup = BeautifulSoup(f.read(), "html.parser")
+
+    # Same line breaks as _block_text: at block elements, not inline markup
+    for el in soup.find_all(sorted(LINE_BREAK_TAGS)):
+        el.insert_before("\n")
+        el.insert_after("\n")
 
+    return _tender_from_text(soup.get_text(), path, 0)
+
+
+def parse_html_tenders(path: str) -> list:
+    """
+    Streams a portal page with lxml and returns one record per tender block
+    (elements whose class includes "rfp" or "tender")
+
+    Each block is cleared once read, so multi-megabyte listing pages are
+    never held as a full tree. Pages without tender blocks fall back to
+    parse_html (whole-page text, single record).
+    """
+    from lxml import etree
+
+    tenders = []
+    for _, el in etree.iterparse(path, events=("end",), tag=TENDER_BLOCK_TAGS, html=True):
+        classes = set((el.get("class") or "").lower().split())
+        if not classes & TENDER_BLOCK_CLASSES:
+            continue
+
+        tenders.append(_tender_from_text(_block_text(el), path, len(tenders)))
+
+        # Drop the parsed block and everything before it
+        el.clear()
+        parent = el.getparent()
+        while parent is not None and el.getprevious() is not None:
+            del parent[0]
+
+    return tenders or [parse_html(path)]
+
+
+def _email_from_text(text: str, path: str) -> dict:
     rfp_id = re.search(r"RFP ID:\s*(\S+)", text)
     due_date = re.search(r"Due Date:\s*(\d{2}-\d{2}-\d{4})", text)
+    issuer = re.search(r"Issuing Authority:\s*(.+)", text)
 
     return {
         "rfp_id": rfp_id.group(1) if rfp_id else "UNKNOWN_EMAIL",
         "due_date": parse_date(due_date.group(1)) if due_date else None,
+        "issuer": issuer.group(1).strip() if issuer else None,
+        "estimated_value": parse_estimated_value(text),
         "source": "EMAIL",
         "path": path
     }
 
 
+def parse_email(path: str) -> dict:
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+
+    return _email_from_text(text, path)
+
+
+def parse_email_message(raw: bytes, ref: str, attachment_dir: str) -> list:
+    """
+    Parses one raw RFC 822 message into an EMAIL record, plus one PDF
+    record per PDF attachment (saved under attachment_dir so the
+    technical agent can read it like any other RFP document)
+    """
+    from email import policy
+    from email.parser import BytesParser
+
+    msg = BytesParser(policy=policy.default).parsebytes(raw)
+
+    body = msg.get_body(preferencelist=("plain", "html"))
+    text = f"Subject: {msg.get('Subject', '')}\n{body.get_content() if body else ''}"
+
+    record = _email_from_text(text, ref)
+    record["attachments"] = []
+    records = [record]
+
+    for part in msg.iter_attachments():
+        filename = part.get_filename() or "attachment"
+        record["attachments"].append(filename)
+
+        if part.get_content_type() != "application/pdf" and not filename.lower().endswith(".pdf"):
+            continue
+
+        safe_ref = re.sub(r"[^A-Za-z0-9_.-]", "_", ref)[-80:]
+        pdf_path = os.path.join(attachment_dir, f"{safe_ref}_{os.path.basename(filename)}")
+        with open(pdf_path, "wb") as f:
+            f.write(part.get_content())
+
+        pdf_record = parse_pdf(pdf_path)
+        pdf_record["email_ref"] = ref
+        for key in ("rfp_id", "due_date", "issuer"):
+            if pdf_record.get(key) in (None, "UNKNOWN_PDF") and record.get(key):
+                pdf_record[key] = record[key]
+        records.append(pdf_record)
+
+    return records
+
+
+def scan_mailbox(path: str, attachment_dir: str, workers: int = None, max_in_flight: int = 64) -> list:
+    """
+    Bulk ingestion of an mbox file, Maildir or folder of .eml files
+
+    Messages are streamed and prefiltered on their Subject header
+    (utils.mailbox_reader); matching messages are decoded and their PDF
+    attachments parsed in a process pool, with at most max_in_flight
+    messages held in memory at once.
+    """
+    from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+    from utils.mailbox_reader import iter_tender_messages
+
+    os.makedirs(attachment_dir, exist_ok=True)
+    rfps = []
+
+    def collect(done):
+        for future in done:
+            try:
+                rfps.extend(future.result())
+            except Exception as e:
+                print(f"[Sales Agent] Failed to parse {pending.pop(future)}: {e}")
+            else:
+                pending.pop(future)
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = {}
+        for ref, raw in iter_tender_messages(path):
+            if len(pending) >= max_in_flight:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done)
+            pending[pool.submit(parse_email_message, raw, ref, attachment_dir)] = ref
+
+        collect(list(pending))
+
+    print(f"[Sales Agent] Mailbox {path}: {len(rfps)} RFP record(s)")
+
+    return rfps
+
+
 def parse_json_file(path: str) -> dict:
     with open(path, "r", encoding="utf-8") as f:
         data = json.load(f)
@@ -75,6 +272,8 @@ def parse_json_file(path: str) -> dict:
     return {
         "rfp_id": data.get("rfp_id", "UNKNOWN_JSON"),
         "due_date": datetime.strptime(data["due_date"], "%Y-%m-%d"),
+        "issuer": data.get("issuing_authority"),
+        "estimated_value": data.get("estimated_value") or data.get("tender_value"),
         "source": "JSON",
         "path": path
     }
@@ -83,16 +282,23 @@ def parse_json_file(path: str) -> dict:
 # -------------------------------------------------
 # Sales Agent logic
 # -------------------------------------------------
-def scan_rfps(folder: str) -> list:
+def scan_rfps(folder: str, attachment_dir: str = None) -> list:
     rfps = []
+    attachment_dir = attachment_dir or os.path.join(folder, ".attachments")
 
     for file in os.listdir(folder):
         path = os.path.join(folder, file)
         try:
-            if file.endswith(".pdf"):
+            if file.endswith(".mbox") or os.path.isdir(os.path.join(path, "cur")):
+                rfps.extend(scan_mailbox(path, attachment_dir))
+            elif file.endswith(".eml"):
+                os.makedirs(attachment_dir, exist_ok=True)
+                with open(path, "rb") as f:
+                    rfps.extend(parse_email_message(f.read(), path, attachment_dir))
+            elif file.endswith(".pdf"):
                 rfps.append(parse_pdf(path))
             elif file.endswith(".html"):
-                rfps.append(parse_html(path))
+                rfps.extend(parse_html_tenders(path))
             elif file.endswith(".txt"):
                 rfps.append(parse_email(path))
             elif file.endswith(".json"):
@@ -103,6 +309,130 @@ def scan_rfps(folder: str) -> list:
     return rfps
 
 
+# -------------------------------------------------
+# Cross-source deduplication
+# -------------------------------------------------
+# Richest source first: the merged record keeps its path
+SOURCE_PRIORITY = ["PDF", "HTML", "EMAIL", "JSON"]
+ISSUER_SIMILARITY = 0.6
+
+
+def normalize_rfp_id(rfp_id: str) -> str:
+    return re.sub(r"[^A-Z0-9]", "", str(rfp_id or "").upper())
+
+
+def normalize_issuer(issuer: str) -> str:
+    return " ".join(re.sub(r"[^a-z0-9 ]", " ", str(issuer or "").lower()).split())
+
+
+def _id_digits(norm_id: str) -> tuple:
+    return tuple(re.findall(r"[0-9]+", norm_id))
+
+
+def build_rfp_index(rfps: list) -> dict:
+    """
+    Groups record positions by (due date, digit runs of the normalized
+    id), so only records that could be duplicates are compared
+    """
+    norm_ids = [normalize_rfp_id(r.get("rfp_id")) for r in rfps]
+    by_key = {}
+
+    for i, r in enumerate(rfps):
+        due = r["due_date"].date() if r.get("due_date") else None
+        by_key.setdefault((due, _id_digits(norm_ids[i])), []).append(i)
+
+    return {
+        "norm_ids": norm_ids,
+        "by_key": by_key
+    }
+
+
+def _is_duplicate(a: dict, b: dict, norm_a: str, norm_b: str) -> bool:
+    # One source never lists the same tender twice
+    if a.get("source") == b.get("source"):
+        return False
+    if any(not n or n.startswith("UNKNOWN") for n in (norm_a, norm_b)):
+        return False
+
+    # Only separators, spacing, case and a leading prefix ("RFP", "TENDER
+    # NO") may differ; sequential numbers like .../0141 and .../0142 are
+    # different tenders
+    if _id_digits(norm_a) != _id_digits(norm_b):
+        return False
+    if not (norm_a.endswith(norm_b) or norm_b.endswith(norm_a)):
+        return False
+
+    issuer_a = normalize_issuer(a.get("issuer"))
+    issuer_b = normalize_issuer(b.get("issuer"))
+    if issuer_a and issuer_b:
+        return SequenceMatcher(None, issuer_a, issuer_b).ratio() >= ISSUER_SIMILARITY
+
+    return True
+
+
+def _merge_rfps(group: list) -> dict:
+    group = sorted(
+        group,
+        key=lambda r: SOURCE_PRIORITY.index(r["source"]) if r["source"] in SOURCE_PRIORITY else len(SOURCE_PRIORITY)
+    )
+    merged = dict(group[0])
+
+    for r in group[1:]:
+        for key in ("due_date", "issuer", "estimated_value"):
+            if not merged.get(key) and r.get(key):
+                merged[key] = r[key]
+
+    merged["sources"] = [r["source"] for r in group]
+    merged["paths"] = [r["path"] for r in group]
+
+    return merged
+
+
+def deduplicate_rfps(rfps: list) -> list:
+    """
+    Collapses the same tender arriving from several sources
+    (PDF / HTML portal / email / aggregator JSON) into one record
+
+    Records are duplicates when they come from different sources, their
+    due dates match, their RFP ids differ at most in separators, case or
+    a leading prefix (digits must be identical), and their issuers (if
+    both known) agree. A merged group never holds two records from the
+    same source. The merged record keeps the richest source's path and
+    lists all sources under "sources" / "paths".
+    """
+    index = build_rfp_index(rfps)
+    norm_ids = index["norm_ids"]
+    parent = list(range(len(rfps)))
+    group_sources = [{r.get("source")} for r in rfps]
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for candidates in index["by_key"].values():
+        for x, i in enumerate(candidates):
+            for j in candidates[x + 1:]:
+                root_i, root_j = find(i), find(j)
+                if root_i == root_j or group_sources[root_i] & group_sources[root_j]:
+                    continue
+                if _is_duplicate(rfps[i], rfps[j], norm_ids[i], norm_ids[j]):
+                    parent[root_j] = root_i
+                    group_sources[root_i] |= group_sources[root_j]
+
+    groups = {}
+    for i, r in enumerate(rfps):
+        groups.setdefault(find(i), []).append(r)
+
+    deduped = [_merge_rfps(g) for g in groups.values()]
+
+    if len(deduped) < len(rfps):
+        print(f"[Sales Agent] Merged {len(rfps) - len(deduped)} duplicate RFP record(s)")
+
+    return deduped
+
+
 def prioritize_rfps(rfps: list, days: int = 90) -> list:
     today = datetime.today()
     cutoff = today + timedelta(days=days)
@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from src.technical_agent import SkuCatalog, match_catalog
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# -------------------------------------------------
+# Shared-memory SKU catalog for worker processes
+# -------------------------------------------------
+# A worker process attaches to the published arrays once (pool initializer)
+# and matches against them zero-copy; only a small spec dict describing
+# the segments is pickled, whatever the catalog size.
+_worker_catalog = None
+_worker_segments = []
+
+
+def _catalog_arrays(catalog: SkuCatalog) -> dict:
+    import numpy as np
+
+    arrays = {
+        "sku_ids": np.asarray(catalog.sku_ids, dtype=str),
+        "prices": np.asarray(catalog.prices)
+    }
+    for rfp_key, values in catalog.fields.items():
+        arrays[f"field:{rfp_key}"] = np.asarray(values, dtype=str)
+    return arrays
+
+
+class SharedCatalog:
+    """
+    Publishes a SkuCatalog's matching arrays into
+    multiprocessing.shared_memory; use as a context manager (or call
+    close()) so the segments are unlinked when the batch is done
+    """
+
+    def __init__(self, catalog: SkuCatalog):
+        import numpy as np
+        from multiprocessing import shared_memory
+
+        self._segments = []
+        self.spec = {}
+
+        for name, array in _catalog_arrays(catalog).items():
+            shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+            np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)[...] = array
+            self._segments.append(shm)
+            self.spec[name] = (shm.name, array.dtype.str, array.shape)
+
+    def close(self):
+        for shm in self._segments:
+            shm.close()
+            shm.unlink()
+        self._segments = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _attach_segment(name: str):
+    from multiprocessing import shared_memory
+
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13 has no track flag; pool workers share the owner's
+        # resource tracker, so the segment is still unlinked exactly once
+        return shared_memory.SharedMemory(name=name)
+
+
+def attach_catalog(spec: dict) -> tuple:
+    """
+    Returns (SkuCatalog view over the shared arrays, segments); the
+    catalog has no DataFrame (df=None), so it supports matching only
+    """
+    import numpy as np
+
+    segments = []
+    arrays = {}
+    for name, (shm_name, dtype, shape) in spec.items():
+        shm = _attach_segment(shm_name)
+        segments.append(shm)
+        arrays[name] = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+
+    catalog = SkuCatalog(
+        sku_ids=arrays["sku_ids"],
+        prices=arrays["prices"],
+        fields={name.split(":", 1)[1]: a for name, a in arrays.items() if name.startswith("field:")},
+        df=None
+    )
+    return catalog, segments
+
+
+def init_catalog_worker(spec: dict):
+    """
+    Pool initializer: attach once per worker process
+    """
+    global _worker_catalog, _worker_segments
+    _worker_catalog, _worker_segments = attach_catalog(spec)
+
+
+def match_in_worker(rfp_specs: dict) -> np.ndarray:
+    """
+    Pool task: compute_spec_match-equivalent ranking against the shared
+    catalog; returns the ranked MATCH_DTYPE array (rows index the
+    original SKU master)
+    """
+    return match_catalog(_worker_catalog, rfp_specs).ranked
+
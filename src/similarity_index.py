@@ -0,0 +1,229 @@
+from __future__ import annotations
+
+import re
+from collections import Counter
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+
+# -------------------------------------------------
+# CONFIG: attribute encoding for closest-SKU lookup
+# numeric: (SKU column, RFP spec key, weight, unit) - a difference of
+# one unit costs the full weight
+# category: (SKU column, RFP spec key, weight) - cost per mismatch
+# -------------------------------------------------
+NUMERIC_FIELDS = [
+    ("Voltage_kV", "voltage_kV", 3.0, 1.0),  # log10: one decade, so 1.1 -> 11 kV costs more than 0.6 -> 1.1 kV
+    ("Cores", "cores", 1.0, 2.0),
+]
+CATEGORY_FIELDS = [
+    ("Conductor", "conductor", 1.0),
+    ("Insulation", "insulation", 1.0),
+    ("Armoured", "armoured", 1.0),
+]
+LOG_SCALED = {"Voltage_kV"}
+
+TEXT_COLUMNS = ["Description", "Product_Description", "Product_Category"]
+TEXT_WEIGHT = 0.5
+TEXT_MAX_FEATURES = 256
+
+
+def _tokens(text: str) -> list:
+    return re.findall(r"[a-z0-9]+(?:\.[0-9]+)?", str(text).lower())
+
+
+class SkuSimilarityIndex:
+    """
+    Exact nearest-neighbour lookup over encoded SKU attributes
+
+    Each SKU becomes a small dense vector scaled so that squared
+    Euclidean distance equals the weighted attribute distance:
+    - numeric fields: (normalized difference)^2 * weight; a SKU without
+      a usable value (missing, or non-positive on a log scale) costs
+      the full weight, as if one unit away
+    - category fields: weight per mismatch (one-hot)
+    - optional TF-IDF over a description column: weight * (1 - cosine)
+
+    There is no tree or ANN structure: a query is a brute-force scan,
+    O(N·d) for N distinct attribute vectors (at most the number of SKUs)
+    of d dimensions, plus an O(N) top-k selection.
+
+    Unlike the exact-equality spec match %, this ranks "11 kV vs 1.1 kV"
+    as further than "1.1 kV vs 0.6 kV", so the closest SKU used for MTO
+    requests and price estimates is actually the closest.
+    """
+
+    def __init__(self, df: pd.DataFrame, text_column: str = None):
+        import numpy as np
+
+        self.df = df
+        self.sku_ids = df["SKU_ID"].to_numpy()
+
+        blocks = []
+        offset = 0
+
+        self._numeric = []
+        for sku_col, rfp_key, weight, unit in NUMERIC_FIELDS:
+            factor = np.sqrt(weight) / unit
+            values = self._scale(sku_col, df[sku_col].to_numpy(dtype=float))
+            # Value column plus a "missing" flag column; the flag is never
+            # compared directly, query() uses it to apply the fixed penalty
+            valid = np.isfinite(values)
+            self._numeric.append((sku_col, rfp_key, factor, offset, np.sqrt(weight)))
+            blocks.append(np.column_stack((np.where(valid, values * factor, 0.0), ~valid)))
+            offset += 2
+
+        self._categories = []
+        for sku_col, rfp_key, weight in CATEGORY_FIELDS:
+            values = df[sku_col].astype(str).str.strip().str.lower().to_numpy()
+            vocab = {v: i for i, v in enumerate(sorted(set(values)))}
+            factor = np.sqrt(weight / 2)
+            onehot = np.zeros((len(values), len(vocab)))
+            onehot[np.arange(len(values)), [vocab[v] for v in values]] = factor
+            self._categories.append((rfp_key, vocab, factor, offset))
+            blocks.append(onehot)
+            offset += len(vocab)
+
+        self.text_column = text_column or next((c for c in TEXT_COLUMNS if c in df.columns), None)
+        self._text_offset = None
+        if self.text_column:
+            self._build_tfidf(df[self.text_column].fillna("").astype(str).tolist())
+            self._text_offset = offset
+            blocks.append(self._tfidf)
+
+        vectors = np.hstack(blocks).astype(np.float32)
+        self._dims = vectors.shape[1]
+
+        # Catalogs repeat the same attribute combination many times, so
+        # distances are computed once per distinct vector; members of a
+        # group are kept cheapest first (same tie-break as spec matching)
+        self.vectors, group = np.unique(vectors, axis=0, return_inverse=True)
+        group = group.ravel()
+        self._members = np.lexsort((df["Unit_Price_per_km_INR"].to_numpy(), group))
+        self._group_start = np.searchsorted(group[self._members], np.arange(len(self.vectors) + 1))
+
+    @staticmethod
+    def _scale(sku_col: str, values):
+        import numpy as np
+
+        if sku_col in LOG_SCALED:
+            with np.errstate(divide="ignore", invalid="ignore"):
+                return np.log10(values)
+        return values
+
+    def _build_tfidf(self, texts: list):
+        import numpy as np
+
+        docs = [_tokens(t) for t in texts]
+        doc_freq = Counter(tok for doc in docs for tok in set(doc))
+        vocab = [tok for tok, _ in doc_freq.most_common(TEXT_MAX_FEATURES)]
+        self._text_vocab = {tok: i for i, tok in enumerate(vocab)}
+        self._idf = np.log((1 + len(docs)) / (1 + np.array([doc_freq[t] for t in vocab]))) + 1
+
+        tfidf = np.zeros((len(docs), len(vocab)))
+        for row, doc in enumerate(docs):
+            for tok, count in Counter(doc).items():
+                col = self._text_vocab.get(tok)
+                if col is not None:
+                    tfidf[row, col] = count
+        tfidf *= self._idf
+        self._tfidf = self._text_scale(tfidf)
+
+    @staticmethod
+    def _text_scale(tfidf):
+        import numpy as np
+
+        # Unit rows scaled so |a - b|^2 = TEXT_WEIGHT * (1 - cos)
+        norms = np.linalg.norm(tfidf, axis=-1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return tfidf / norms * np.sqrt(TEXT_WEIGHT / 2)
+
+    def _encode(self, rfp_specs: dict, text: str = None) -> tuple:
+        """
+        Returns (query vector, mask of dimensions the RFP specifies)
+        """
+        import numpy as np
+
+        query = np.zeros(self._dims, dtype=np.float32)
+        mask = np.zeros(self._dims, dtype=bool)
+
+        for sku_col, rfp_key, factor, offset, _ in self._numeric:
+            value = rfp_specs.get(rfp_key)
+            if value is None:
+                continue
+            with np.errstate(divide="ignore", invalid="ignore"):
+                scaled = self._scale(sku_col, np.array([float(value)]))[0]
+            if np.isfinite(scaled):
+                query[offset] = scaled * factor
+                mask[offset] = True
+
+        for rfp_key, vocab, factor, offset in self._categories:
+            value = rfp_specs.get(rfp_key)
+            if value is None:
+                continue
+            # Unseen values stay all-zero: equally far from every SKU
+            col = vocab.get(str(value).strip().lower())
+            if col is not None:
+                query[offset + col] = factor
+            mask[offset:offset + len(vocab)] = True
+
+        if text and self._text_offset is not None:
+            counts = np.zeros(len(self._text_vocab))
+            for tok, count in Counter(_tokens(text)).items():
+                col = self._text_vocab.get(tok)
+                if col is not None:
+                    counts[col] = count
+            if counts.any():
+                end = self._text_offset + len(self._text_vocab)
+                query[self._text_offset:end] = self._text_scale(counts * self._idf)
+                mask[self._text_offset:end] = True
+
+        return query, mask
+
+    def query(self, rfp_specs: dict, k: int = 5, text: str = None) -> list:
+        """
+        Returns [(row position, distance)] for the k closest SKUs,
+        nearest first; spec keys that are None are ignored
+        """
+        import numpy as np
+
+        query, mask = self._encode(rfp_specs, text)
+        diff = self.vectors[:, mask] - query[mask]
+        for _, _, _, offset, missing_cost in self._numeric:
+            if mask[offset]:
+                missing = self.vectors[:, offset + 1] > 0
+                diff[missing, np.count_nonzero(mask[:offset])] = missing_cost
+        dist = np.sqrt(np.einsum("ij,ij->i", diff, diff))
+
+        # Every group has at least one member, so the k nearest groups
+        # are enough; groups tied with the k-th stay in so ties still
+        # break by group order, as a stable full sort would
+        candidates = np.arange(len(dist))
+        if len(dist) > k:
+            kth = dist[np.argpartition(dist, k - 1)[k - 1]]
+            candidates = np.flatnonzero(dist <= kth)
+
+        results = []
+        for g in candidates[np.argsort(dist[candidates], kind="stable")].tolist():
+            start, end = self._group_start[g], self._group_start[g + 1]
+            for row in self._members[start:min(end, start + k - len(results))].tolist():
+                results.append((row, float(dist[g])))
+            if len(results) >= k:
+                break
+
+        return results
+
+    def closest_skus(self, rfp_specs: dict, k: int = 5, text: str = None) -> list:
+        """
+        SKU master rows (as dicts) for the k closest SKUs, each with a
+        "similarity_distance" key and its "catalog_row" position
+        """
+        rows = []
+        for row, distance in self.query(rfp_specs, k, text):
+            sku = self.df.iloc[row].to_dict()
+            sku["similarity_distance"] = distance
+            sku["catalog_row"] = row
+            rows.append(sku)
+        return rows
@@ -0,0 +1,130 @@
+import csv
+import os
+
+from src.pricing_agent import iter_pricing
+
+# -------------------------------------------------
+# Consolidated summary export (XLSX / CSV)
+# -------------------------------------------------
+# Same columns as ResultsStore.decision_summary / pricing_summary; values
+# are written raw (floats, ISO dates, None -> empty) so spreadsheets and
+# downstream tools get numbers, not "₹ 1,234" strings.
+# doc_path tells apart documents (e.g. revisions) that share an RFP ID.
+DECISION_COLUMNS = ["rfp_id", "doc_path", "due_date", "best_sku", "spec_match_pct", "classification", "mto_triggered"]
+PRICING_COLUMNS = ["rfp_id", "doc_path", "sku_id", "classification", "material_cost", "test_cost", "total_cost"]
+
+EXPORT_FORMATS = ("xlsx", "csv")
+
+
+def _cell(value):
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    if hasattr(value, "item"):
+        return value.item()
+    return value
+
+
+class SummaryWriter:
+    """
+    Streams decision and pricing rows to disk as they are produced
+
+    - xlsx: openpyxl write_only workbook ("Decisions" and "Pricing"
+      sheets); rows go to temp files, so memory stays flat however many
+      pricing lines are written
+    - csv: <prefix>_decisions.csv and <prefix>_pricing.csv
+
+    Use as a context manager (or call close()) to finalize the files;
+    paths lists what was written.
+    """
+
+    def __init__(self, out_dir: str, prefix: str = "rfp_summary", formats: tuple = EXPORT_FORMATS):
+        unknown = set(formats) - set(EXPORT_FORMATS)
+        if unknown:
+            raise ValueError(f"Unsupported export format(s): {', '.join(sorted(unknown))}")
+
+        os.makedirs(out_dir, exist_ok=True)
+        base = os.path.join(out_dir, prefix)
+        self.paths = []
+        self._files = []
+        self._sinks = {"decisions": [], "pricing": []}
+
+        if "csv" in formats:
+            for sheet, columns in (("decisions", DECISION_COLUMNS), ("pricing", PRICING_COLUMNS)):
+                path = f"{base}_{sheet}.csv"
+                f = open(path, "w", newline="", encoding="utf-8")
+                writer = csv.writer(f)
+                writer.writerow(columns)
+                self._files.append(f)
+                self._sinks[sheet].append(writer.writerow)
+                self.paths.append(path)
+
+        self._workbook = None
+        if "xlsx" in formats:
+            from openpyxl import Workbook
+
+            self._workbook = Workbook(write_only=True)
+            self._xlsx_path = f"{base}.xlsx"
+            for sheet, columns in (("decisions", DECISION_COLUMNS), ("pricing", PRICING_COLUMNS)):
+                ws = self._workbook.create_sheet(sheet.capitalize())
+                ws.append(columns)
+                self._sinks[sheet].append(ws.append)
+            self.paths.append(self._xlsx_path)
+
+    def _write(self, sheet: str, values: list):
+        for sink in self._sinks[sheet]:
+            sink(values)
+
+    def write_decision(self, row: dict):
+        self._write("decisions", [_cell(row.get(c)) for c in DECISION_COLUMNS])
+
+    def write_pricing(self, row: dict):
+        self._write("pricing", [_cell(row.get(c)) for c in PRICING_COLUMNS])
+
+    def write_result(self, rfp: dict, decision: dict, priced=None, catalog=None, extra_pricing: list = None):
+        """
+        One processed RFP document (rfp["path"] is its doc_path) straight
+        from the pipeline: its decision row plus every priced SKU (pricing_agent.price_matches output) and
+        any extra pricing dicts (e.g. the MTO estimate line)
+        """
+        doc_path = rfp.get("path") or ""
+        self.write_decision(dict(decision, rfp_id=rfp["rfp_id"], doc_path=doc_path, due_date=rfp.get("due_date")))
+
+        if priced is not None:
+            for p in iter_pricing(priced, catalog):
+                self._write("pricing", [
+                    rfp["rfp_id"], doc_path, p.sku_id, p.match_classification,
+                    p.material_cost, p.test_cost, p.total_cost
+                ])
+        for p in extra_pricing or []:
+            self.write_pricing(dict(p, rfp_id=rfp["rfp_id"], doc_path=doc_path))
+
+    def close(self):
+        for f in self._files:
+            f.close()
+        self._files = []
+        if self._workbook is not None:
+            self._workbook.save(self._xlsx_path)
+            self._workbook = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def export_store(store, out_dir: str, rfp_ids: list = None, prefix: str = "rfp_summary",
+                 formats: tuple = EXPORT_FORMATS, doc_keys: list = None) -> list:
+    """
+    Exports the consolidated summaries held in a ResultsStore, streaming
+    straight from the SQLite cursors; returns the written paths
+
+    rfp_ids / doc_keys ((rfp_id, doc_path) pairs) restrict the export
+    as in ResultsStore.iter_decision_summary
+    """
+    with SummaryWriter(out_dir, prefix, formats) as writer:
+        for row in store.iter_decision_summary(rfp_ids, doc_keys=doc_keys):
+            writer.write_decision(row)
+        for row in store.iter_pricing_summary(rfp_ids, doc_keys=doc_keys):
+            writer.write_pricing(row)
+    return writer.paths
@@ -1,4 +1,11 @@
-import pandas as pd
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
 
 # -------------------------------------------------
 # CONFIG: which fields participate in spec matching
@@ -12,6 +19,10 @@ MATCH_FIELDS = [
     ("Armoured", "armoured")
 ]
 
+STRONG_MATCH_PCT = 80
+PARTIAL_MATCH_PCT = 50
+MATCH_CACHE_SIZE = 256
+
 # -------------------------------------------------
 # Load SKU master from Excel
 # -------------------------------------------------
@@ -19,6 +30,8 @@ def load_skus(sku_path: str) -> pd.DataFrame:
     """
     Loads SKU master data from Excel file
     """
+    import pandas as pd
+
     df = pd.read_excel(sku_path)
     return df
 
@@ -73,6 +86,8 @@ def build_comparison_table(df: pd.DataFrame, rfp_specs: dict, top_n: int = 3) ->
     """
     Builds a comparison table between RFP requirements and top N SKU matches
     """
+    import pandas as pd
+
     top_df = df.head(top_n)
 
     comparison = {
@@ -97,8 +112,8 @@ def build_comparison_table(df: pd.DataFrame, rfp_specs: dict, top_n: int = 3) ->
         comparison["Spec"].append(label)
         comparison["RFP Requirement"].append(rfp_specs[rfp_key])
 
-        for _, row in top_df.iterrows():
-            comparison[row["SKU_ID"]].append(row[sku_col])
+        for sku_id, value in zip(top_df["SKU_ID"], top_df[sku_col]):
+            comparison[sku_id].append(value)
 
     return pd.DataFrame(comparison)
 def classify_match(df: pd.DataFrame) -> pd.DataFrame:
@@ -106,14 +121,271 @@ def classify_match(df: pd.DataFrame) -> pd.DataFrame:
     Adds business-level match classification based on spec_match_pct
     """
     df = df.copy()
+    df["match_classification"] = classify_pct(df["spec_match_pct"].to_numpy())
+    return df
+
+
+def classify_pct(pct: np.ndarray) -> np.ndarray:
+    """
+    Vectorized STRONG / PARTIAL / NO_MATCH classification of spec match %
+    """
+    import numpy as np
+
+    return np.select(
+        [pct >= STRONG_MATCH_PCT, pct >= PARTIAL_MATCH_PCT],
+        ["STRONG_MATCH", "PARTIAL_MATCH"],
+        default="NO_MATCH"
+    ).astype(object)
+
+
+# -------------------------------------------------
+# Compact hot-path representation
+# -------------------------------------------------
+# Ranked matches are a NumPy structured array (6 bytes per SKU) instead of
+# a copied DataFrame; MatchRecord rows are only built for what gets shown.
+MATCH_CLASSES = ("STRONG_MATCH", "PARTIAL_MATCH", "NO_MATCH")
+NO_MATCH_CODE = 2
+MATCH_DTYPE = [("row", "i4"), ("matched_count", "i1"), ("match_class", "i1")]
+
+
+@dataclass(slots=True)
+class SkuCatalog:
+    """
+    SKU master prepared once for repeated matching: one lowercased
+    string array per match field plus ids and prices
+    """
+    sku_ids: np.ndarray
+    prices: np.ndarray
+    fields: dict
+    df: pd.DataFrame
+    version: str = ""  # content hash of the matching arrays (see catalog_version)
+
+
+@dataclass(slots=True)
+class MatchRecord:
+    sku_id: str
+    spec_match_pct: float
+    match_classification: str
+    unit_price: float
+    row: int  # position in SkuCatalog.df
+
 
-    def classify(pct):
-        if pct >= 80:
-            return "STRONG_MATCH"
-        elif pct >= 50:
-            return "PARTIAL_MATCH"
-        else:
-            return "NO_MATCH"
+@dataclass(slots=True)
+class MatchResult:
+    ranked: np.ndarray  # MATCH_DTYPE, best first
+    catalog: SkuCatalog
+
+    def __len__(self) -> int:
+        return len(self.ranked)
+
+    def pct(self) -> np.ndarray:
+        return self.ranked["matched_count"] * (100 / len(MATCH_FIELDS))
+
+    def record(self, i: int) -> MatchRecord:
+        row, count, code = self.ranked[i].tolist()
+        return MatchRecord(
+            sku_id=self.catalog.sku_ids[row],
+            spec_match_pct=count * 100 / len(MATCH_FIELDS),
+            match_classification=MATCH_CLASSES[code],
+            unit_price=self.catalog.prices[row].item(),
+            row=row
+        )
+
+    def top(self, n: int) -> list:
+        return [self.record(i) for i in range(min(n, len(self.ranked)))]
+
+    def has_no_match(self) -> bool:
+        return bool((self.ranked["match_class"] == NO_MATCH_CODE).any())
+
+    def eligible_count(self) -> int:
+        # STRONG / PARTIAL rows form the head of the ranking
+        return int((self.ranked["match_class"] != NO_MATCH_CODE).sum())
+
+
+def build_catalog(df: pd.DataFrame) -> SkuCatalog:
+    """
+    Normalizes the SKU master once so matching doesn't copy or
+    re-stringify the DataFrame for every RFP
+    """
+    catalog = SkuCatalog(
+        sku_ids=df["SKU_ID"].to_numpy(),
+        prices=df["Unit_Price_per_km_INR"].to_numpy(),
+        fields={
+            rfp_key: df[sku_col].astype(str).str.lower().to_numpy(dtype=str)
+            for sku_col, rfp_key in MATCH_FIELDS
+        },
+        df=df
+    )
+    catalog.version = catalog_version(catalog)
+    return catalog
+
+
+def catalog_version(catalog: SkuCatalog) -> str:
+    """
+    Hash of everything that affects ranking (ids, prices, match
+    fields): changes whenever the SKU master does
+    """
+    import hashlib
+    import numpy as np
+
+    h = hashlib.blake2b(digest_size=16)
+    h.update(np.asarray(catalog.sku_ids, dtype=str).tobytes())
+    h.update(np.asarray(catalog.prices, dtype=float).tobytes())
+    for rfp_key in sorted(catalog.fields):
+        h.update(rfp_key.encode())
+        h.update(np.asarray(catalog.fields[rfp_key], dtype=str).tobytes())
+    return h.hexdigest()
+
+
+def spec_signature(rfp_specs: dict) -> tuple:
+    """
+    The normalized spec values match_catalog actually compares; RFPs
+    with the same signature get the same ranking
+    """
+    return tuple(str(rfp_specs.get(rfp_key)).lower() for _, rfp_key in MATCH_FIELDS)
+
+
+def count_matches(catalog: SkuCatalog, rfp_specs: dict, rows: np.ndarray = None) -> np.ndarray:
+    """
+    Number of matched fields per SKU, or only for the catalog rows given
+    """
+    import numpy as np
+
+    matched_count = np.zeros(len(catalog.sku_ids) if rows is None else len(rows), dtype=np.int8)
+    for _, rfp_key in MATCH_FIELDS:
+        values = catalog.fields[rfp_key] if rows is None else catalog.fields[rfp_key][rows]
+        matched_count += values == str(rfp_specs.get(rfp_key)).lower()
+    return matched_count
+
+
+def _ranked_result(catalog: SkuCatalog, rows: np.ndarray, matched_count: np.ndarray) -> MatchResult:
+    # rows / matched_count already in rank order
+    import numpy as np
+
+    pct = matched_count * (100 / len(MATCH_FIELDS))
+    ranked = np.empty(len(rows), dtype=MATCH_DTYPE)
+    ranked["row"] = rows
+    ranked["matched_count"] = matched_count
+    ranked["match_class"] = np.select(
+        [pct >= STRONG_MATCH_PCT, pct >= PARTIAL_MATCH_PCT],
+        [0, 1],
+        default=NO_MATCH_CODE
+    )
+
+    return MatchResult(ranked, catalog)
+
+
+def match_catalog(catalog: SkuCatalog, rfp_specs: dict) -> MatchResult:
+    """
+    Same scoring, ranking and classification as
+    classify_match(compute_spec_match(df, rfp_specs)), without
+    copying the catalog
+    """
+    import numpy as np
+
+    matched_count = count_matches(catalog, rfp_specs)
+
+    # Higher spec match first, lower price as tie-breaker (stable, like sort_values)
+    order = np.lexsort((catalog.prices, -matched_count))
+
+    return _ranked_result(catalog, order, matched_count[order])
+
+
+def rank_rows(catalog: SkuCatalog, rows: np.ndarray, matched_count: np.ndarray) -> MatchResult:
+    """
+    Ranks a subset of catalog rows with known matched field counts in
+    match_catalog order (more fields, then lower price, then catalog
+    position); the result only holds those rows
+    """
+    import numpy as np
+
+    order = np.lexsort((rows, catalog.prices[rows], -matched_count))
+
+    return _ranked_result(catalog, rows[order], matched_count[order])
+
+
+class MatchCache:
+    """
+    Thread-safe LRU of ranked matches keyed on (catalog version, spec
+    signature), so the common spec combinations skip rescoring and
+    resorting the catalog
+
+    Entries for a previous catalog version are dropped the first time a
+    rebuilt catalog (new SKU master) is seen. Cached ranked arrays are
+    read-only and shared between results.
+    """
+
+    def __init__(self, maxsize: int = MATCH_CACHE_SIZE):
+        import threading
+        from collections import OrderedDict
+
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._version = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def match(self, catalog: SkuCatalog, rfp_specs: dict) -> MatchResult:
+        key = spec_signature(rfp_specs)
+
+        with self._lock:
+            if catalog.version != self._version:
+                if self._entries:
+                    self.invalidations += 1
+                self._entries.clear()
+                self._version = catalog.version
+
+            ranked = self._entries.get(key)
+            if ranked is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return MatchResult(ranked, catalog)
+            self.misses += 1
+
+        ranked = match_catalog(catalog, rfp_specs).ranked
+        ranked.flags.writeable = False
+
+        with self._lock:
+            if catalog.version == self._version:
+                self._entries[key] = ranked
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+
+        return MatchResult(ranked, catalog)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._version = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "catalog_version": self._version
+            }
+
+
+def matches_to_frame(result: MatchResult) -> pd.DataFrame:
+    """
+    Display-edge conversion: SKU master columns plus spec_match_pct and
+    match_classification, in ranked order
+    """
+    import numpy as np
 
-    df["match_classification"] = df["spec_match_pct"].apply(classify)
+    df = result.catalog.df.iloc[result.ranked["row"]].copy()
+    df["spec_match_pct"] = result.pct()
+    df["match_classification"] = np.array(MATCH_CLASSES, dtype=object)[result.ranked["match_class"]]
     return df
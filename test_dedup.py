@@ -0,0 +1,53 @@
+from datetime import datetime
+
+from src.sales_agent import deduplicate_rfps
+
+
+def _rfp(rfp_id, source, path, issuer="National Infrastructure Authority"):
+    return {
+        "rfp_id": rfp_id,
+        "source": source,
+        "issuer": issuer,
+        "due_date": datetime(2026, 11, 25),
+        "path": path
+    }
+
+
+def test_sequential_ids_stay_separate():
+    rfps = [
+        _rfp("NIA/CAB/2026/0141", "PDF", "a.pdf"),
+        _rfp("NIA/CAB/2026/0142", "PDF", "b.pdf"),
+        _rfp("NIA/CAB/2026/0143", "HTML", "c.html")
+    ]
+    deduped = deduplicate_rfps(rfps)
+    assert sorted(r["path"] for r in deduped) == ["a.pdf", "b.pdf", "c.html"]
+
+
+def test_same_tender_across_sources_is_merged():
+    rfps = [
+        _rfp("NIA/CAB/2026/0141", "PDF", "a.pdf"),
+        _rfp("Tender No. nia-cab 2026 0141", "EMAIL", "a.txt"),
+        _rfp("NIA / CAB / 2026 / 0141", "HTML", "a.html")
+    ]
+    deduped = deduplicate_rfps(rfps)
+    assert len(deduped) == 1
+    assert deduped[0]["path"] == "a.pdf"
+    assert sorted(deduped[0]["sources"]) == ["EMAIL", "HTML", "PDF"]
+
+
+def test_same_source_is_never_merged():
+    rfps = [
+        _rfp("NIA/CAB/2026/0141", "PDF", "a.pdf"),
+        _rfp("NIA/CAB/2026/0141", "HTML", "a.html"),
+        _rfp("NIA-CAB-2026-0141", "PDF", "a_copy.pdf")
+    ]
+    deduped = deduplicate_rfps(rfps)
+    assert len(deduped) == 2
+    assert all(len(set(r.get("sources", [r["source"]]))) == len(r.get("sources", [r["source"]])) for r in deduped)
+
+
+if __name__ == "__main__":
+    test_sequential_ids_stay_separate()
+    test_same_tender_across_sources_is_merged()
+    test_same_source_is_never_merged()
+    print("dedup tests passed")
@@ -0,0 +1,53 @@
+import os
+import tempfile
+
+from src.sales_agent import parse_html_tenders
+
+# Whole listing on one line, as portals often serve it
+MINIFIED_PAGE = (
+    '<html><body>'
+    '<div class="tender"><p><strong>RFP ID:</strong> EPC-HTML-002</p>'
+    '<p><strong>Issuing Authority:</strong> ABC <em>Infrastructure</em> Pvt Ltd</p>'
+    '<p><strong>Due Date:</strong> 25-11-2026</p></div>'
+    '<li class="rfp">RFP ID: EPC-HTML-003<br>Issuing Authority: XYZ Power Corp<br>Due Date: 01-12-2026</li>'
+    '</body></html>'
+)
+
+
+def _parse(html):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "listing.html")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(html)
+        return parse_html_tenders(path)
+
+
+def test_minified_fields_stay_separate():
+    tenders = _parse(MINIFIED_PAGE)
+    assert [t["rfp_id"] for t in tenders] == ["EPC-HTML-002", "EPC-HTML-003"]
+    assert [t["issuer"] for t in tenders] == ["ABC Infrastructure Pvt Ltd", "XYZ Power Corp"]
+    assert [t["due_date"].strftime("%d-%m-%Y") for t in tenders] == ["25-11-2026", "01-12-2026"]
+
+
+def test_comments_are_not_block_text():
+    page = MINIFIED_PAGE.replace(
+        "<strong>Due Date:</strong>", "<strong>Due Date:</strong><!-- RFP ID: EPC-HIDDEN-999 -->"
+    )
+    tenders = _parse(page)
+    assert [t["rfp_id"] for t in tenders] == ["EPC-HTML-002", "EPC-HTML-003"]
+    # The text after the comment (its tail) is kept
+    assert tenders[0]["due_date"].strftime("%d-%m-%Y") == "25-11-2026"
+
+
+def test_page_without_tender_blocks_falls_back():
+    tenders = _parse(MINIFIED_PAGE.replace('class="tender"', "").replace('class="rfp"', ""))
+    assert len(tenders) == 1
+    assert tenders[0]["rfp_id"] == "EPC-HTML-002"
+    assert tenders[0]["issuer"] == "ABC Infrastructure Pvt Ltd"
+
+
+if __name__ == "__main__":
+    test_minified_fields_stay_separate()
+    test_comments_are_not_block_text()
+    test_page_without_tender_blocks_falls_back()
+    print("html tender tests passed")
@@ -0,0 +1,61 @@
+import os
+
+import pytest
+
+from bench_matching import synthetic_skus, synthetic_specs
+from bench_shared_catalog import run, noop, init_pickled_worker, match_pickled
+from src.technical_agent import build_catalog
+from src.shared_catalog import SharedCatalog, init_catalog_worker, match_in_worker, _catalog_arrays
+
+SMALL_SKUS = 5_000
+LARGE_SKUS = 100_000
+
+pytestmark = pytest.mark.skipif(
+    not os.path.exists("/proc/self/smaps_rollup"), reason="private memory is read from Linux smaps_rollup"
+)
+
+
+def _catalog(n_skus):
+    catalog = build_catalog(synthetic_skus(n_skus))
+    catalog.df = None  # workers only need the matching arrays
+    return catalog
+
+
+def _per_worker_bytes(catalog, workers, shared=True):
+    """
+    Private memory each worker holds after matching, on top of an idle
+    pool with the same imports
+    """
+    specs_list = synthetic_specs(workers * 2)
+    baseline = run(workers, None, (), noop, specs_list)
+    if shared:
+        with SharedCatalog(catalog) as published:
+            used = run(workers, init_catalog_worker, (published.spec,), match_in_worker, specs_list)
+    else:
+        used = run(workers, init_pickled_worker, (catalog,), match_pickled, specs_list)
+    return (used - baseline) / workers
+
+
+@pytest.fixture(scope="module")
+def catalogs():
+    small, large = _catalog(SMALL_SKUS), _catalog(LARGE_SKUS)
+    added_bytes = sum(a.nbytes for a in _catalog_arrays(large).values()) - sum(
+        a.nbytes for a in _catalog_arrays(small).values()
+    )
+    return small, large, added_bytes
+
+
+def test_pickled_catalog_is_detected(catalogs):
+    # Control: a per-worker copy shows up as private memory
+    small, large, added_bytes = catalogs
+    growth = _per_worker_bytes(large, 1, shared=False) - _per_worker_bytes(small, 1, shared=False)
+    assert growth > added_bytes / 2
+
+
+@pytest.mark.parametrize("workers", [1, 2, 4])
+def test_shared_worker_memory_does_not_grow_with_catalog(catalogs, workers):
+    # Only per-query temporaries (a few bytes per SKU) may scale with the
+    # catalog; the catalog arrays themselves must stay shared
+    small, large, added_bytes = catalogs
+    growth = _per_worker_bytes(large, workers) - _per_worker_bytes(small, workers)
+    assert growth < added_bytes / 4
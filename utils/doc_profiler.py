@@ -0,0 +1,242 @@
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+PROFILE_DIR = "data/profiles"
+SLOW_DOC_THRESHOLD_S = 10.0
+SAMPLE_INTERVAL_S = 0.005
+TOP_STACKS = 200
+
+
+def file_sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _fold_stack(frame) -> str:
+    # "file:function;file:function;..." root first, as used by flame graph tools
+    parts = []
+    while frame is not None:
+        code = frame.f_code
+        parts.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+        frame = frame.f_back
+    return ";".join(reversed(parts))
+
+
+class DocumentProfiler:
+    """
+    Opt-in per-document latency tracking for the RFP pipeline
+
+    Every document gets per-stage timings. Documents whose active
+    processing time exceeds threshold_s also get a profile written to
+    output_dir, named by document hash, with rfp_id, page count and
+    timings alongside:
+    - mode="sampling": one background thread per profiler, running only
+      while documents are in flight, samples the stack of each document
+      past the threshold every interval_s (near-zero cost for fast
+      documents); saved as folded stacks in <hash>.json
+    - mode="cprofile": cProfile runs for the whole document and is kept
+      only if it turned out slow; saved as <hash>.prof (pstats)
+    """
+
+    def __init__(
+        self,
+        output_dir: str = PROFILE_DIR,
+        threshold_s: float = SLOW_DOC_THRESHOLD_S,
+        mode: str = "sampling",
+        interval_s: float = SAMPLE_INTERVAL_S
+    ):
+        if mode not in ("sampling", "cprofile"):
+            raise ValueError(f"Unknown profiling mode: {mode}")
+
+        self.output_dir = output_dir
+        self.threshold_s = threshold_s
+        self.mode = mode
+        self.interval_s = interval_s
+        self.reports = []
+        self._lock = threading.Lock()
+        self._runs = set()  # sampling-mode documents not finished yet
+        self._sampler = None
+
+    def document(self, rfp: dict):
+        return DocumentRun(self, rfp)
+
+    def _record(self, report: dict):
+        with self._lock:
+            self.reports.append(report)
+
+    def _register(self, run: "DocumentRun"):
+        # The shared sampler is started on demand and exits once no
+        # document is left, so an idle profiler holds no thread
+        with self._lock:
+            self._runs.add(run)
+            if self._sampler is None:
+                self._sampler = threading.Thread(target=self._sample, daemon=True)
+                self._sampler.start()
+
+    def _unregister(self, run: "DocumentRun"):
+        with self._lock:
+            self._runs.discard(run)
+
+    def _sample(self):
+        while True:
+            time.sleep(self.interval_s)
+            with self._lock:
+                if not self._runs:
+                    self._sampler = None
+                    return
+                slow = [
+                    run for run in self._runs
+                    if run._started is not None and run.active_seconds() >= self.threshold_s
+                ]
+                if not slow:
+                    continue
+
+                frames = sys._current_frames()
+                for run in slow:
+                    frame = frames.get(run._thread_id)
+                    if frame is not None:
+                        run.samples[_fold_stack(frame)] += 1
+
+
+class DocumentRun:
+    """
+    Timing/profiling state for one document. The pipeline calls
+    resume()/pause() around each slice of work (a job can be preempted
+    and resumed on another thread), stage() around named steps and
+    finish() at the end.
+    """
+
+    def __init__(self, profiler: DocumentProfiler, rfp: dict):
+        self.profiler = profiler
+        self.rfp = rfp
+        self.stages = {}
+        self.samples = Counter()
+
+        self._active_s = 0.0
+        self._started = None
+        self._thread_id = None
+        self._registered = False
+        self._cprofile = None
+
+        if profiler.mode == "cprofile":
+            import cProfile
+            self._cprofile = cProfile.Profile()
+
+    def active_seconds(self) -> float:
+        started = self._started
+        return self._active_s + (time.perf_counter() - started if started is not None else 0.0)
+
+    def resume(self):
+        self._thread_id = threading.get_ident()
+        self._started = time.perf_counter()
+
+        if self._cprofile is not None:
+            self._cprofile.enable()
+        elif not self._registered:
+            self._registered = True
+            self.profiler._register(self)
+
+    def pause(self):
+        if self._started is None:
+            return
+        if self._cprofile is not None:
+            self._cprofile.disable()
+        self._active_s += time.perf_counter() - self._started
+        self._started = None
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - start
+
+    def finish(self) -> dict:
+        self.pause()
+        if self._registered:
+            # Under the profiler lock: no sample lands after this
+            self.profiler._unregister(self)
+
+        elapsed = self._active_s
+        report = {
+            "rfp_id": self.rfp.get("rfp_id"),
+            "path": self.rfp.get("path"),
+            "elapsed_s": round(elapsed, 4),
+            "stages_s": {k: round(v, 4) for k, v in self.stages.items()},
+            "slow": elapsed > self.profiler.threshold_s,
+            "profile_path": None
+        }
+
+        if report["slow"]:
+            report["profile_path"] = self._save(report)
+            print(
+                f"[Profiler] {report['rfp_id']} took {elapsed:.1f}s "
+                f"(> {self.profiler.threshold_s:.1f}s); profile saved to {report['profile_path']}"
+            )
+
+        self.profiler._record(report)
+        return report
+
+    def _save(self, report: dict) -> str:
+        os.makedirs(self.profiler.output_dir, exist_ok=True)
+
+        path = self.rfp.get("path")
+        doc_hash = file_sha256(path) if path and os.path.exists(path) else "unknown"
+        page_count = self.rfp.get("page_count")
+        if page_count is None and path and path.lower().endswith(".pdf"):
+            from PyPDF2 import PdfReader
+            page_count = len(PdfReader(path).pages)
+
+        base = os.path.join(self.profiler.output_dir, f"{doc_hash[:16]}_{int(time.time())}")
+        meta = dict(
+            report,
+            doc_hash=doc_hash,
+            page_count=page_count,
+            threshold_s=self.profiler.threshold_s,
+            mode=self.profiler.mode
+        )
+
+        if self._cprofile is not None:
+            meta["profile_path"] = base + ".prof"
+            self._cprofile.dump_stats(meta["profile_path"])
+        else:
+            meta["profile_path"] = base + ".json"
+            meta["sample_interval_s"] = self.profiler.interval_s
+            meta["folded_stacks"] = dict(self.samples.most_common(TOP_STACKS))
+
+        with open(base + ".json", "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=2, default=str)
+
+        return meta["profile_path"]
+
+
+class _NoProfile:
+    """
+    Stand-in when profiling is off: same interface, does nothing
+    """
+
+    def resume(self):
+        pass
+
+    def pause(self):
+        pass
+
+    @contextmanager
+    def stage(self, name: str):
+        yield
+
+    def finish(self):
+        return None
+
+
+NO_PROFILE = _NoProfile()
@@ -0,0 +1,64 @@
+import os
+import re
+import mailbox
+from email import policy
+from email.parser import BytesHeaderParser
+
+# Subjects worth decoding; everything else is skipped on headers alone
+TENDER_SUBJECT_PATTERN = re.compile(r"\b(rfp|rfq|tender|bid|proposal|quotation)\b", re.IGNORECASE)
+
+
+def _open_mailbox(path: str):
+    if os.path.isdir(path):
+        if all(os.path.isdir(os.path.join(path, d)) for d in ("cur", "new", "tmp")):
+            return mailbox.Maildir(path, factory=None, create=False)
+        return None
+    return mailbox.mbox(path, factory=None, create=False)
+
+
+def _read_header_block(f) -> bytes:
+    # Header lines up to the first blank line; the body is left unread
+    lines = []
+    for line in iter(f.readline, b""):
+        if line in (b"\n", b"\r\n"):
+            break
+        lines.append(line)
+    return b"".join(lines)
+
+
+def _eml_files(folder: str):
+    for file in sorted(os.listdir(folder)):
+        if file.endswith(".eml"):
+            yield os.path.join(folder, file)
+
+
+def iter_tender_messages(path: str, subject_pattern=TENDER_SUBJECT_PATTERN):
+    """
+    Streams (message_ref, raw_bytes) for tender-looking messages in an
+    mbox file, a Maildir, or a folder of .eml files
+
+    Only headers are parsed to apply the subject prefilter; bodies of
+    non-matching messages are never read. Messages are read one at a
+    time, so the archive is never loaded into memory as a whole.
+    """
+    # policy.default decodes RFC 2047 encoded-words ("=?UTF-8?B?...?=")
+    # so encoded subjects are matched on their text
+    header_parser = BytesHeaderParser(policy=policy.default)
+    box = _open_mailbox(path)
+
+    if box is None:
+        sources = ((p, lambda p=p: open(p, "rb")) for p in _eml_files(path))
+    else:
+        sources = ((f"{path}#{key}", lambda key=key: box.get_file(key)) for key in box.iterkeys())
+
+    try:
+        for ref, open_fn in sources:
+            with open_fn() as f:
+                headers = header_parser.parsebytes(_read_header_block(f))
+                if not subject_pattern.search(str(headers.get("Subject", ""))):
+                    continue
+                f.seek(0)
+                yield ref, f.read()
+    finally:
+        if box is not None:
+            box.close()
@@ -1,10 +1,17 @@
-from PyPDF2 import PdfReader
+def iter_page_text(pdf_path: str):
+    """
+    Yields the text of each page so callers can stop or pause between pages
+    """
+    from PyPDF2 import PdfReader
 
-def extract_full_text(pdf_path: str) -> str:
     reader = PdfReader(pdf_path)
-    text = ""
     for page in reader.pages:
-        page_text = page.extract_text()
+        yield page.extract_text() or ""
+
+
+def extract_full_text(pdf_path: str) -> str:
+    text = ""
+    for page_text in iter_page_text(pdf_path):
         if page_text:
             text += page_text + "\n"
     return text